@@ -1,9 +1,44 @@
 name = "crcsolver"
 
 from . import main
+from . import engine
+from . import reveng
+from .engine import CrcEngine
+from .stream import Crc
+from .combine import crc_combine, crc_shift
 
-def solve(data, unknowns, desired, crc_func):
-	return main.solve(data, unknowns, desired, crc_func)
+def solve(data, unknowns, desired, crc_func, allowed=None, executor=None):
+	return main.solve(data, unknowns, desired, crc_func, allowed, executor)
 
-def compute(data, crc_name):
-	return main.compute(data, crc_name)
+async def solve_async(data, unknowns, desired, crc_func):
+	return await main.solve_async(data, unknowns, desired, crc_func)
+
+def solutions(data, unknowns, desired, crc_func, allowed=None, executor=None):
+	return main.solutions(data, unknowns, desired, crc_func, allowed, executor)
+
+def solve_many(records, unknowns, desired, crc_func, executor=None):
+	return main.solve_many(records, unknowns, desired, crc_func, executor)
+
+def prepare(length, unknowns, crc_func, executor=None):
+	return main.prepare(length, unknowns, crc_func, executor)
+
+def compute(data, crc_name, workers=None):
+	return main.compute(data, crc_name, workers)
+
+def compute_batch(messages, crc_name):
+	return main.compute_batch(messages, crc_name)
+
+def compute_file(path, crc_name, workers=None):
+	return main.compute_file(path, crc_name, workers)
+
+def lookup(crc_name):
+	return engine.lookup(crc_name)
+
+def new(crc_name, data=b''):
+	return Crc(crc_name, data)
+
+def identify(samples, width=None, catalog=True, workers=None):
+	return reveng.identify(samples, width, catalog, workers)
+
+def screen(samples, width=None, workers=None, limit=None):
+	return reveng.screen(samples, width, workers, limit)
@@ -0,0 +1,249 @@
+// optional compiled kernels, the package works the same without them
+//
+// make_tables() and update() are the table and slicing loops of engine.py for
+// registers of at most 64 bits, xor_reduce() is XorBasis.reduce() from
+// subsetxor.py for vectors of at most 64 bits
+//
+// engine.py checks these against every catalog check value at import and
+// falls back to pure python if anything disagrees
+
+#define PY_SSIZE_T_CLEAN
+#include <Python.h>
+#include <stdint.h>
+
+static uint64_t mask_of(int bits)
+{
+	if (bits >= 64)
+		return ~(uint64_t)0;
+	return ((uint64_t)1 << bits) - 1;
+}
+
+static int top_bit(uint64_t x)
+{
+	int result = 0;
+	int shift;
+	for (shift = 32; shift; shift >>= 1) {
+		if (x >> shift) {
+			x >>= shift;
+			result += shift;
+		}
+	}
+	return result;
+}
+
+static uint64_t reflect(uint64_t x, int width)
+{
+	uint64_t y = 0;
+	int i;
+	for (i = 0; i < width; i++) {
+		y = (y << 1) | (x & 1);
+		x >>= 1;
+	}
+	return y;
+}
+
+static int register_width(int width, int refin)
+{
+	if (refin || width >= 8)
+		return width;
+	return 8;
+}
+
+// zero byte into the register, like engine.advance()
+static uint64_t advance(const uint64_t *table, uint64_t reg, int rwidth, int refin)
+{
+	if (refin)
+		return table[reg & 0xFF] ^ (reg >> 8);
+	return table[(reg >> (rwidth - 8)) & 0xFF] ^ ((reg << 8) & mask_of(rwidth));
+}
+
+// make_tables(width, poly, refin, n) -> bytes holding n tables of 256 uint64,
+// table k is the register after clocking byte i then k zero bytes
+static PyObject *make_tables(PyObject *self, PyObject *args)
+{
+	int width, refin, n, rwidth, i, k;
+	unsigned long long poly;
+	uint64_t *tables;
+	PyObject *result;
+
+	if (!PyArg_ParseTuple(args, "iKpi", &width, &poly, &refin, &n))
+		return NULL;
+	rwidth = register_width(width, refin);
+	if (width < 1 || rwidth > 64 || n < 1) {
+		PyErr_Format(PyExc_ValueError, "unsupported width %d or table count %d", width, n);
+		return NULL;
+	}
+
+	tables = PyMem_Malloc(sizeof(uint64_t) * 256 * n);
+	if (!tables)
+		return PyErr_NoMemory();
+
+	for (i = 0; i < 256; i++) {
+		uint64_t reg;
+		if (refin) {
+			uint64_t rpoly = reflect(poly, width);
+			reg = i;
+			for (k = 0; k < 8; k++)
+				reg = (reg & 1) ? (reg >> 1) ^ rpoly : reg >> 1;
+		} else {
+			uint64_t rpoly = (uint64_t)poly << (rwidth - width);
+			uint64_t msb = (uint64_t)1 << (rwidth - 1);
+			reg = (uint64_t)i << (rwidth - 8);
+			for (k = 0; k < 8; k++)
+				reg = (reg & msb) ? ((reg ^ msb) << 1) ^ rpoly : reg << 1;
+		}
+		tables[i] = reg;
+	}
+
+	for (k = 1; k < n; k++)
+		for (i = 0; i < 256; i++)
+			tables[256*k + i] = advance(tables, tables[256*(k-1) + i], rwidth, refin);
+
+	result = PyBytes_FromStringAndSize((const char *)tables, sizeof(uint64_t) * 256 * n);
+	PyMem_Free(tables);
+	return result;
+}
+
+// update(tables, reg, data, rwidth, refin) -> reg, clocking data into the
+// register len(tables)/256 bytes at a time, like engine.update_slicing()
+static PyObject *update(PyObject *self, PyObject *args)
+{
+	Py_buffer tbuf, dbuf;
+	unsigned long long reg_in;
+	int rwidth, refin;
+	uint64_t reg;
+
+	if (!PyArg_ParseTuple(args, "y*Ky*ip", &tbuf, &reg_in, &dbuf, &rwidth, &refin))
+		return NULL;
+
+	if (tbuf.len == 0 || tbuf.len % (256 * sizeof(uint64_t)) || (uintptr_t)tbuf.buf % sizeof(uint64_t)
+	  || rwidth < 1 || rwidth > 64 || (!refin && rwidth < 8)) {
+		PyBuffer_Release(&tbuf);
+		PyBuffer_Release(&dbuf);
+		PyErr_SetString(PyExc_ValueError, "tables must be aligned 256 entry uint64 tables, registers 64 bits at most");
+		return NULL;
+	}
+
+	reg = reg_in;
+	{
+		const uint64_t *t = tbuf.buf;
+		const uint8_t *d = dbuf.buf;
+		Py_ssize_t len = dbuf.len, n = tbuf.len / (256 * sizeof(uint64_t)), p = 0, j;
+		Py_ssize_t nbits = 8 * n;
+
+		Py_BEGIN_ALLOW_THREADS
+
+		if (n > 1 && refin) {
+			for (; p + n <= len; p += n) {
+				uint64_t acc = nbits < 64 ? reg >> nbits : 0;
+				for (j = 0; j < n; j++) {
+					uint8_t b = d[p+j];
+					if (j < 8)
+						b ^= (uint8_t)(reg >> (8*j));
+					acc ^= t[256*(n-1-j) + b];
+				}
+				reg = acc;
+			}
+		} else if (n > 1) {
+			for (; p + n <= len; p += n) {
+				// register bits below the consumed bytes, if it is wider than them
+				uint64_t acc = rwidth > nbits ? (reg & mask_of(rwidth - nbits)) << nbits : 0;
+				for (j = 0; j < n; j++) {
+					Py_ssize_t s = rwidth - 8 - 8*j;
+					uint8_t b = d[p+j];
+					if (s >= 0)
+						b ^= (uint8_t)(reg >> s);
+					else if (s > -8)
+						b ^= (uint8_t)(reg << -s);
+					acc ^= t[256*(n-1-j) + b];
+				}
+				reg = acc;
+			}
+		}
+
+		// tail, a byte at a time
+		if (refin) {
+			for (; p < len; p++)
+				reg = t[(reg ^ d[p]) & 0xFF] ^ (reg >> 8);
+		} else {
+			uint64_t mask = mask_of(rwidth);
+			for (; p < len; p++)
+				reg = t[((reg >> (rwidth - 8)) ^ d[p]) & 0xFF] ^ ((reg << 8) & mask);
+		}
+
+		Py_END_ALLOW_THREADS
+	}
+
+	PyBuffer_Release(&tbuf);
+	PyBuffer_Release(&dbuf);
+	return PyLong_FromUnsignedLongLong(reg);
+}
+
+// xor_reduce(pivots, vec, combo) -> (vec, combo), XorBasis.reduce() where
+// pivots maps a leading bit to (vector, combo), vec is at most 64 bits
+static PyObject *xor_reduce(PyObject *self, PyObject *args)
+{
+	PyObject *pivots, *vec_obj, *combo;
+	uint64_t vec, rest;
+
+	if (!PyArg_ParseTuple(args, "O!OO", &PyDict_Type, &pivots, &vec_obj, &combo))
+		return NULL;
+
+	vec = PyLong_AsUnsignedLongLong(vec_obj);
+	if (vec == (uint64_t)-1 && PyErr_Occurred())
+		return NULL;
+
+	Py_INCREF(combo);
+	rest = vec;
+	while (rest) {
+		int top = top_bit(rest);
+		PyObject *key = PyLong_FromLong(top);
+		PyObject *pivot;
+		if (!key)
+			goto fail;
+		pivot = PyDict_GetItemWithError(pivots, key);
+		Py_DECREF(key);
+		if (pivot) {
+			uint64_t pvec;
+			PyObject *next;
+			if (!PyTuple_Check(pivot) || PyTuple_GET_SIZE(pivot) != 2) {
+				PyErr_SetString(PyExc_TypeError, "pivots must be (vector, combo) tuples");
+				goto fail;
+			}
+			pvec = PyLong_AsUnsignedLongLong(PyTuple_GET_ITEM(pivot, 0));
+			if (pvec == (uint64_t)-1 && PyErr_Occurred())
+				goto fail;
+			next = PyNumber_Xor(combo, PyTuple_GET_ITEM(pivot, 1));
+			if (!next)
+				goto fail;
+			Py_DECREF(combo);
+			combo = next;
+			vec ^= pvec;
+		} else if (PyErr_Occurred()) {
+			goto fail;
+		}
+		rest = vec & (((uint64_t)1 << top) - 1);
+	}
+
+	return Py_BuildValue("(KN)", (unsigned long long)vec, combo);
+
+fail:
+	Py_DECREF(combo);
+	return NULL;
+}
+
+static PyMethodDef methods[] = {
+	{"make_tables", make_tables, METH_VARARGS, "make_tables(width, poly, refin, n) -> bytes of n 256 entry uint64 tables"},
+	{"update", update, METH_VARARGS, "update(tables, reg, data, rwidth, refin) -> register after clocking in data"},
+	{"xor_reduce", xor_reduce, METH_VARARGS, "xor_reduce(pivots, vec, combo) -> (vec, combo) with every pivot bit cleared"},
+	{NULL, NULL, 0, NULL}
+};
+
+static struct PyModuleDef module = {
+	PyModuleDef_HEAD_INIT, "_native", "optional compiled kernels for crcsolver", -1, methods
+};
+
+PyMODINIT_FUNC PyInit__native(void)
+{
+	return PyModule_Create(&module);
+}
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+
+# checksums of many equal length messages at once
+#
+# the messages are the rows of an N x L uint8 array and N registers advance
+# in lockstep, one byte column at a time, each step being a vectorized table
+# lookup and a few shifts and xors over all N registers
+#
+# numpy is optional, without it (or for registers wider than 64 bits) each
+# message goes through the table engine in turn, it is imported when first
+# needed, as in packed.py
+
+import functools
+
+from . import engine
+from .packed import get_numpy
+
+# narrowest unsigned type holding a register of each width
+def register_type(rwidth):
+	numpy = get_numpy()
+	for dtype in [numpy.uint16, numpy.uint32, numpy.uint64]:
+		if rwidth <= 8*numpy.dtype(dtype).itemsize:
+			return dtype
+
+# (width, poly, refin) -> table as an array of register_type()
+tables = {}
+def get_table(width, poly, refin):
+	numpy = get_numpy()
+	key = (width, poly, refin)
+	if not key in tables:
+		dtype = register_type(engine.register_width(width, refin))
+		tables[key] = numpy.array(engine.get_table(width, poly, refin), dtype=dtype)
+	return tables[key]
+
+def as_array(messages):
+	''' N x L uint8 array from an array or a sequence of equal length buffers '''
+	numpy = get_numpy()
+	if isinstance(messages, numpy.ndarray):
+		if messages.dtype != numpy.uint8:
+			raise Exception('expected a uint8 array of messages, got %s' % messages.dtype)
+		array = messages
+	else:
+		messages = [engine.as_bytes(m) for m in messages]
+		lengths = set(len(m) for m in messages)
+		if len(lengths) > 1:
+			raise Exception('messages must have equal lengths, got %s' % sorted(lengths))
+		length = lengths.pop() if lengths else 0
+		array = numpy.frombuffer(b''.join(messages), dtype=numpy.uint8).reshape(len(messages), length)
+
+	if array.ndim != 2:
+		raise Exception('expected an N x L array of messages, got %d dimensions' % array.ndim)
+	return array
+
+def reflect(regs, width):
+	''' engine.reflect() over an array '''
+	numpy = get_numpy()
+	t = regs.dtype.type
+	result = numpy.zeros_like(regs)
+	for i in range(width):
+		result |= ((regs >> t(i)) & t(1)) << t(width-1-i)
+	return result
+
+def compute(messages, crc_name):
+	''' checksums of the messages as an array, or a list without numpy '''
+	numpy = get_numpy()
+	crc = engine.lookup(crc_name)
+	(width, refin) = (crc.width, crc.refin)
+	rwidth = engine.register_width(width, refin)
+
+	if not numpy or rwidth > 64:
+		return [crc.compute(m) for m in messages]
+
+	array = as_array(messages)
+	table = get_table(width, crc.poly, refin)
+	t = table.dtype.type
+
+	# columns made contiguous, so each step reads a run of bytes, the byte
+	# indexing the table is taken by truncating to uint8 rather than masking
+	columns = numpy.ascontiguousarray(array.T)
+	regs = numpy.full(array.shape[0], crc.initial(), dtype=t)
+
+	if refin:
+		for column in columns:
+			regs = table[regs.astype(numpy.uint8) ^ column] ^ (regs >> t(8))
+	else:
+		(shift, mask) = (t(rwidth - 8), t((1<<rwidth) - 1))
+		for column in columns:
+			regs = table[(regs >> shift).astype(numpy.uint8) ^ column] ^ ((regs << t(8)) & mask)
+
+	# CrcEngine.finalize(), vectorized
+	regs >>= t(crc.shift)
+	if crc.refin != crc.refout:
+		regs = reflect(regs, width)
+	regs ^= t(crc.final_xor)
+	return regs
+
+# solve_many() works the same way: with the checksum of every emptied record
+# known, each byte of the targets indexes its plan lane, here as arrays of the
+# check values and of the bytes the lane's combo flips, so N records cost a
+# lookup and xor per target byte over all N at once
+
+@functools.lru_cache(maxsize=64)
+def plan_tables(plan):
+	''' (offsets, keep, checks, flips) for a SolvePlan, offsets are the bytes
+		holding unknowns, keep their known bits, and checks[k] (256) and
+		flips[k] (256 x offsets) the lanes of plan.lanes[k] '''
+	numpy = get_numpy()
+	offsets = sorted(plan.keep)
+	column = {offset: i for (i, offset) in enumerate(offsets)}
+	keep = numpy.array([plan.keep[offset] for offset in offsets], dtype=numpy.uint8)
+
+	# lanes are linear in the byte value, so each is the xor of its entries
+	# for single bits
+	values = numpy.arange(256)
+	(checks, flips) = ([], [])
+	for lane in plan.lanes:
+		check = numpy.zeros(256, dtype=numpy.uint64)
+		flip = numpy.zeros((256, len(offsets)), dtype=numpy.uint8)
+		for b in range(8):
+			(c, combo) = lane[1<<b]
+			row = numpy.zeros(len(offsets), dtype=numpy.uint8)
+			for (i, bit) in enumerate(bin(combo)[:1:-1]):
+				if bit == '1':
+					row[column[plan.offsets[i]]] ^= plan.masks[i]
+			selected = ((values >> b) & 1) == 1
+			check[selected] ^= numpy.uint64(c)
+			flip[selected] ^= row
+		checks.append(check)
+		flips.append(flip)
+
+	return (numpy.array(offsets, dtype=numpy.intp), keep, checks, flips)
+
+def solve(plan, records, desired):
+	''' plan.apply() of each record (an N x L uint8 array or a list of
+		buffers) and its desired checksum, a list with None for records that
+		cannot be solved '''
+	numpy = get_numpy()
+	if not numpy or plan.system.width > 64:
+		return [plan.apply(data, target) for (data, target) in zip(records, desired)]
+
+	array = as_array(records)
+	(n, length) = array.shape
+	if length != plan.length:
+		raise Exception('plan is for %d byte messages, got %d' % (plan.length, length))
+
+	(offsets, keep, checks, flips) = plan_tables(plan)
+	emptied = array.copy()
+	emptied[:, offsets] &= keep
+
+	crc = plan.crc_func
+	try:
+		wanted = numpy.array(desired, dtype=numpy.uint64)
+		if isinstance(crc, engine.CrcEngine) and engine.register_width(crc.width, crc.refin) <= 64:
+			checksums = compute(emptied, crc).astype(numpy.uint64)
+		else:
+			checksums = numpy.array([crc(row.tobytes()) for row in emptied], dtype=numpy.uint64)
+	except OverflowError:
+		# checksums or targets wider than 64 bits, which no solution reaches
+		return [plan.apply(data, target) for (data, target) in zip(records, desired)]
+
+	t = numpy.uint64
+	targets = checksums ^ wanted
+	check = numpy.zeros(n, dtype=t)
+	flip = numpy.zeros((n, len(offsets)), dtype=numpy.uint8)
+	for (k, (lane_check, lane_flip)) in enumerate(zip(checks, flips)):
+		v = ((targets >> t(8*k)) & t(0xFF)).astype(numpy.intp)
+		check ^= lane_check[v]
+		flip ^= lane_flip[v]
+	emptied[:, offsets] ^= flip
+
+	rows = emptied.tobytes()
+	return [rows[length*i:length*(i+1)] if solved else None for (i, solved) in enumerate((check == targets).tolist())]
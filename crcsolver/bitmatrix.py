@@ -1,21 +1,48 @@
 #!/usr/bin/env python3
 
+import os
 import sys
 import random
 
+from . import packed
+
+# matrices with at least this many bits are eliminated by the packed numpy
+# backend (see packed.py) when numpy is available
+PACKED_THRESHOLD = 1<<17
+
+# invariants are checked when a matrix is built and when a single row is set
+# or appended, full check_consistency() passes before every operation are
+# only made in debug mode, eg: CRCSOLVER_DEBUG=1 or bitmatrix.DEBUG = True
+DEBUG = bool(os.environ.get('CRCSOLVER_DEBUG'))
+
 class MatrixException(Exception):
 	pass
 
+if hasattr(int, 'bit_count'):
+	def parity(x):
+		return x.bit_count() & 1
+else:
+	def parity(x):
+		return bin(x).count('1') & 1
+
 class BitMatrix():
+	__slots__ = ('nrows', 'ncols', 'rows')
+
 	def __init__(self, nrows, ncols, rows=[]):
 		self.nrows = nrows
 		self.ncols = ncols
 
-		self.rows = [0] * nrows
-		for i in range(len(rows)):
-			self.rows[i] = rows[i]
+		if len(rows) > nrows:
+			raise MatrixException('%d rows specified, but %d rows found' % (nrows, len(rows)))
+
+		self.rows = list(rows) + [0] * (nrows - len(rows))
+		if rows and max(rows).bit_length() > ncols:
+			raise MatrixException('%d columns specified, but 0x%X is wider' % (ncols, max(rows)))
 
-		self.check_consistency()
+	def debug_check(self):
+		''' full validation, only in debug mode '''
+		if DEBUG:
+			self.check_consistency()
 
 	def check_consistency(self):
 		if len(self.rows) > self.nrows:
@@ -37,7 +64,7 @@ class BitMatrix():
 
 	def set_random_independent_rows(self):
 		''' this is a basis if nrows==ncols '''
-		self.check_consistency()
+		self.debug_check()
 
 		if self.nrows > self.ncols:
 			raise MatrixException('%d %d-bit rows cannot all be independent' % (self.nrows, self.ncols))
@@ -73,17 +100,22 @@ class BitMatrix():
 			if not (value & (1<<(self.nrows-1-i))):
 				self.rows[i] ^= probe
 
+	def set_row(self, i, row):
+		if row.bit_length() > self.ncols:
+			raise MatrixException('cannot set 0x%X as its width exceeds columns %d' % (row, self.ncols))
+		self.rows[i] = row
+
 	def row_append(self, row):
-		self.check_consistency()
+		self.debug_check()
 
-		if row >= (1<<self.ncols):
+		if row.bit_length() > self.ncols:
 			raise MatrixException('cannot append 0x%X as its width exceeds columns %d' % (row, self.ncols))
 
 		self.nrows += 1
 		self.rows.append(row)
 
 	def row_pop(self):
-		self.check_consistency()
+		self.debug_check()
 
 		if self.nrows <= 0:
 			raise MatrixException('attempting to pop a row from empty row matrix')
@@ -94,44 +126,60 @@ class BitMatrix():
 	def row_echelon(self, record=None):
 		''' calculate row echelon form
 			row echelon is identity -> record is inverse '''
+		echelon = self.clone()
+		echelon.eliminate(record)
+		return echelon
 
-		self.check_consistency()
+	def eliminate(self, record=None):
+		''' row echelon form, in place, record (if given) receives the same
+			row operations, returns the pivot columns so rank is their count '''
+		self.debug_check()
 		(nrows, ncols) = (self.nrows, self.ncols)
 
-		# use a dummy record if no reference provided
-		if not record:
-			record = BitMatrix(nrows, 1)
+		if record:
+			record.debug_check()
+			if self.nrows != record.nrows:
+				raise MatrixException('record matrix has %d rows, mismatch our %d rows' % (record.nrows, self.nrows))
 
-		record.check_consistency()
-		if self.nrows != record.nrows:
-			raise MatrixException('record matrix has %d rows, mismatch our %d rows' % (record.nrows, self.nrows))
+		if nrows*ncols >= PACKED_THRESHOLD and packed.get_numpy():
+			if record:
+				(self.rows[:], record.rows[:], pivots) = packed.row_echelon(self.rows, ncols, record.rows, record.ncols)
+			else:
+				(self.rows[:], _, pivots) = packed.row_echelon(self.rows, ncols)
+			return pivots
 
+		rows = self.rows
+		pivots = []
 		pos = 0
-		echelon = self.clone()
-		for mask in [1<<x for x in range(ncols-1,-1,-1)]:
+		for col in range(ncols):
+			if pos >= nrows:
+				break
+			mask = 1<<(ncols-1-col)
+
 			# find first index with bit set
-			miss = True
 			for i in range(pos, nrows):
-				if echelon.rows[i] & mask:
-					miss = False; break
-			if miss: continue
+				if rows[i] & mask:
+					break
+			else:
+				continue
 
 			# swap into position
 			if i != pos:
-				(echelon.rows[i], echelon.rows[pos]) = (echelon.rows[pos], echelon.rows[i])
-				(record.rows[i], record.rows[pos]) = (record.rows[pos], record.rows[i])
+				(rows[i], rows[pos]) = (rows[pos], rows[i])
+				if record:
+					(record.rows[i], record.rows[pos]) = (record.rows[pos], record.rows[i])
 
 			# add it to all applicable rows
-			for i in (x for x in range(nrows) if x!=pos):
-				if echelon.rows[i] & mask:
-					echelon.rows[i] ^= echelon.rows[pos]
-					record.rows[i] ^= record.rows[pos]
+			for i in range(nrows):
+				if i != pos and rows[i] & mask:
+					rows[i] ^= rows[pos]
+					if record:
+						record.rows[i] ^= record.rows[pos]
 
+			pivots.append(col)
 			pos += 1
-			if pos >= nrows:
-				break
 
-		return echelon
+		return pivots
 
 	def rank(self):
 		''' dimension of the vector space spanned by rows
@@ -139,7 +187,7 @@ class BitMatrix():
 		return len([x for x in self.rows if x]) # quantity of nonzero rows
 
 	def inverse(self):
-		self.check_consistency()
+		self.debug_check()
 
 		if self.nrows != self.ncols:
 			raise MatrixException('inversion impossible since rows != columns, %d != %d' % (self.nrows, self.ncols))
@@ -147,10 +195,9 @@ class BitMatrix():
 		record = BitMatrix(self.nrows, self.ncols)
 		record.set_identity()
 
-		echelon = self.row_echelon(record)
-		rank = echelon.rank()
-		if rank != echelon.nrows:
-			raise MatrixException('inversion impossible, rank %d != nrows %d' % (rank, echelon.nrows))
+		rank = len(self.clone().eliminate(record))
+		if rank != self.nrows:
+			raise MatrixException('inversion impossible, rank %d != nrows %d' % (rank, self.nrows))
 
 		return record
 
@@ -161,22 +208,35 @@ class BitMatrix():
 		return tra
 
 	def __mul__(self, rhs):
+		''' row i of the product is the xor of the rows of rhs selected by the
+			bits of our row i, so no columns are ever extracted '''
 		if self.ncols != rhs.nrows:
 			raise MatrixException('requested factors cannot be multiplied')
 
-		new_nrows = self.nrows
-		new_ncols = rhs.ncols
-		result = BitMatrix(new_nrows, new_ncols)
+		result = BitMatrix(self.nrows, rhs.ncols)
 
-		for x in range(new_ncols):
-			for y in range(new_nrows):
-				tmp = self.rows[y] & rhs.get_column(x)
-				tmp = sum(map(int, bin(tmp)[2:])) % 2
-				if tmp:
-					result.rows[y] |= (1<<(new_ncols-1-x))
+		top = self.ncols - 1
+		for (y, row) in enumerate(self.rows):
+			acc = 0
+			while row:
+				msb = row.bit_length() - 1
+				acc ^= rhs.rows[top-msb]
+				row ^= 1<<msb
+			result.rows[y] = acc
 
 		return result
 
+	def mul_vector(self, vec):
+		''' matrix times column vector, vec and the result are integers with
+			element 0 in the msb, like a row '''
+		if vec.bit_length() > self.ncols:
+			raise MatrixException('vector 0x%X is wider than %d columns' % (vec, self.ncols))
+
+		result = 0
+		for row in self.rows:
+			result = (result << 1) | parity(row & vec)
+		return result
+
 	def clone(self):
 		tmp = BitMatrix(self.nrows, self.ncols, list(self.rows))
 		return tmp
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+
+# zlib style crc_combine() and crc_shift()
+#
+# appending a zero byte is a linear map on the (unreflected, pre-xorout)
+# register, represented as a width x width BitMatrix, so appending n zero
+# bytes is that matrix raised to the n'th power, by repeated squaring
+#
+# crc(A||B) = L^len(B)(reg(A) ^ init) ^ reg(B)
+
+from . import engine
+from .engine import reflect
+from .bitmatrix import BitMatrix
+
+def register(eng, checksum):
+	''' undo xorout and refout, leaving the unreflected register '''
+	if eng.entry['refout']:
+		checksum = reflect(checksum, eng.width)
+	return checksum ^ eng.entry['xorout']
+
+def checksum(eng, reg):
+	''' inverse of register() '''
+	reg ^= eng.entry['xorout']
+	if eng.entry['refout']:
+		reg = reflect(reg, eng.width)
+	return reg
+
+def zero_byte_operator(eng):
+	''' matrix that clocks a zero byte into an unreflected register
+		row/column 0 is the msb of the register '''
+	(width, poly) = (eng.width, eng.poly)
+	msb_mask = 1<<(width-1)
+
+	result = BitMatrix(width, width)
+	for col in range(width):
+		reg = 1<<(width-1-col)
+		for i in range(8):
+			if reg & msb_mask:
+				reg = ((reg ^ msb_mask) << 1) ^ poly
+			else:
+				reg = reg << 1
+		result.set_column(col, reg)
+
+	return result
+
+# params_key() -> [L, L^2, L^4, L^8, ...]
+operators = {}
+def operator_powers(eng, count):
+	''' the first count powers L^(2^k) of the zero byte operator '''
+	key = engine.params_key(eng.entry)
+	if not key in operators:
+		operators[key] = [zero_byte_operator(eng)]
+	powers = operators[key]
+	while len(powers) < count:
+		powers.append(powers[-1] * powers[-1])
+	return powers
+
+def shift_register(eng, reg, nbytes):
+	''' clock nbytes zero bytes into an unreflected register in O(log(nbytes)) '''
+	powers = operator_powers(eng, nbytes.bit_length())
+	k = 0
+	while nbytes:
+		if nbytes & 1:
+			reg = powers[k].mul_vector(reg)
+		nbytes >>= 1
+		k += 1
+	return reg
+
+def crc_shift(crc, nbytes, crc_name):
+	''' given crc(A), return crc(A || nbytes zero bytes) '''
+	eng = engine.lookup(crc_name)
+	reg = shift_register(eng, register(eng, crc), nbytes)
+	return checksum(eng, reg)
+
+def crc_combine(crc1, crc2, len2, crc_name):
+	''' given crc(A), crc(B) and len(B), return crc(A || B) '''
+	eng = engine.lookup(crc_name)
+	reg = register(eng, crc1) ^ eng.entry['init']
+	reg = shift_register(eng, reg, len2) ^ register(eng, crc2)
+	return checksum(eng, reg)
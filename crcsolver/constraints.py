@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+
+# solving with per-byte constraints, eg: printable ascii
+#
+# each byte's allowed values are split into affine pieces, sets of the form
+# base ^ span(directions) lying entirely inside the allowed values, eg: the
+# printable 0x20..0x7E start with 0x20 ^ span(0x01, 0x02, 0x04, 0x08, 0x10, 0x60),
+# the 64 values 0x20..0x5F, then the remaining 0x60..0x7E in smaller pieces
+#
+# with every byte restricted to one piece the problem is linear again: the
+# directions are the unknowns and the bases shift the target, so the whole
+# solution space of that system satisfies the constraints and nothing is
+# rejected, the nullspace is walked exactly as in SolvePlan.solutions()
+#
+# pieces are tried largest first, so the first system has the most freedom
+#
+# the choices are searched depth first, a byte at a time, carrying the crc and
+# the pieces chosen so far as GF(2) equations over the unknown bits in an
+# incremental XorBasis: a branch is dropped as soon as its equations are
+# inconsistent, ie: no message, whatever the bytes not yet chosen hold, has
+# both the desired crc and the chosen pieces, so a shared prefix is reduced
+# once and an unsolvable target is usually rejected at the first few bytes
+#
+# the worst case is still exponential in the number of constrained bytes: a
+# target reachable only when the last bytes leave the allowed values is found
+# out one leaf at a time, and a system with few free bits beyond the crc width
+# (eg: 16 hex digits against a 64 bit crc) is mostly such targets, so the search
+# gives up after SEARCH_LIMIT piece choices without a solution
+
+import functools
+
+from . import subsetxor
+
+# piece choices tried between solutions before solutions() raises, a few seconds
+SEARCH_LIMIT = 100000
+
+def allowed_values(allowed):
+	''' byte values from a predicate, a str/bytes charset or an iterable of ints '''
+	if callable(allowed):
+		return frozenset(v for v in range(256) if allowed(v))
+	if type(allowed) == str:
+		allowed = allowed.encode('latin-1')
+	return frozenset(allowed)
+
+def largest_piece(values):
+	''' (base, directions) with every base ^ span(directions) in values, grown
+		greedily from each possible base, preferring directions of fewer bits '''
+	best = None
+	limit = len(values).bit_length() - 1
+	for base in sorted(values):
+		members = {base}
+		directions = []
+		candidates = sorted((base ^ v for v in values if v != base), key=lambda d: (bin(d).count('1'), d))
+		for d in candidates:
+			# already spanned
+			if base ^ d in members:
+				continue
+			if all(m ^ d in values for m in members):
+				members |= {m ^ d for m in members}
+				directions.append(d)
+
+		if not best or len(directions) > len(best[1]):
+			best = (base, directions)
+			if len(directions) == limit:
+				break
+
+	return best
+
+@functools.lru_cache(maxsize=None)
+def pieces(values):
+	''' partition a frozenset of byte values into affine pieces, largest first '''
+	remaining = set(values)
+	result = []
+	while remaining:
+		(base, directions) = largest_piece(remaining)
+		members = [base]
+		for d in directions:
+			members += [m ^ d for m in members]
+		remaining -= set(members)
+		result.append((base, tuple(directions)))
+	return sorted(result, key=lambda p: -len(p[1]))
+
+def solutions(plan, data, desired, allowed):
+	''' generate every solution of plan whose unknown bytes satisfy allowed, a
+		charset/predicate for all of them or a dict of byte index -> charset/predicate
+		unknowns should not repeat, or solutions will too
+		raises if SEARCH_LIMIT piece choices pass without finding a solution '''
+	(emptied, target) = plan.target(data, desired)
+
+	# byte index -> [(bit within byte, influence of that bit), ...]
+	layout = {}
+	for (position, inp) in zip(plan.unknowns, plan.inputs):
+		layout.setdefault(position//8, []).append((1<<(7-position%8), inp))
+	order = sorted(layout)
+
+	def influence(index, value):
+		result = 0
+		for (bit, inp) in layout[index]:
+			if value & bit:
+				result ^= inp
+		return result
+
+	# the pieces of each byte, among the values that agree with its known bits
+	choices = []
+	for index in order:
+		if type(allowed) == dict:
+			values = allowed_values(allowed.get(index, range(256)))
+		else:
+			values = allowed_values(allowed)
+		mask = functools.reduce(lambda a,b:a|b, [bit for (bit, inp) in layout[index]])
+		known = emptied[index]
+		values = frozenset(v for v in values if (v & ~mask) == known)
+		if not values:
+			return
+		choices.append(pieces(values))
+
+	# unknown bits are columns 1.. of the equations, column 0 holds the right
+	# hand side, so an equation reducing to 1 reads 0 = 1
+	columns = {}
+	for index in order:
+		for (bit, inp) in layout[index]:
+			columns[(index, bit)] = 1 << (len(columns) + 1)
+
+	def parity(x):
+		return bin(x).count('1') & 1
+
+	def consistent(basis, equation):
+		''' add equation to basis, False if it contradicts the basis '''
+		(rest, combo) = basis.reduce(equation)
+		if rest == 1:
+			return False
+		basis.insert(rest)
+		return True
+
+	def equations(index, base, directions):
+		''' the piece as equations over the byte's unknown bits, one for each
+			independent parity of unknown bits that is constant across it '''
+		bits = [bit for (bit, inp) in layout[index]]
+		mask = functools.reduce(lambda a,b:a|b, bits)
+		found = subsetxor.XorBasis()
+		for w in range(1, 256):
+			if not w & ~mask and not any(parity(w & d) for d in directions):
+				found.insert(w)
+		result = []
+		for (w, combo) in found.pivots.values():
+			equation = parity(w & base)
+			for bit in bits:
+				if w & bit:
+					equation |= columns[(index, bit)]
+			result.append(equation)
+		return result
+
+	# the crc, an equation per target bit
+	basis = subsetxor.XorBasis()
+	width = max([target.bit_length()] + [inp.bit_length() for inp in plan.inputs])
+	for j in range(width):
+		equation = (target >> j) & 1
+		for index in order:
+			for (bit, inp) in layout[index]:
+				if (inp >> j) & 1:
+					equation |= columns[(index, bit)]
+		if not consistent(basis, equation):
+			return
+
+	constraints = [[equations(index, base, directions) for (base, directions) in choice] for (index, choice) in zip(order, choices)]
+
+	# piece choices tried since the last solution
+	tried = [0]
+
+	def search(depth, basis):
+		''' piece choices for the bytes from depth on, consistent with basis,
+			in the order of itertools.product() '''
+		if depth == len(order):
+			yield ()
+			return
+		for (piece, piece_equations) in zip(choices[depth], constraints[depth]):
+			tried[0] += 1
+			if tried[0] > SEARCH_LIMIT:
+				raise Exception('no solution within %d piece choices, the constraints leave too little freedom' % SEARCH_LIMIT)
+			branch = basis.copy()
+			if all(consistent(branch, e) for e in piece_equations):
+				for rest in search(depth+1, branch):
+					yield (piece,) + rest
+
+	for choice in search(0, basis):
+		# bases fix part of the target, directions become the unknowns, each
+		# flipping (byte index, bits) of the message
+		t = target
+		(inputs, patches) = ([], [])
+		for (index, (base, directions)) in zip(order, choice):
+			t ^= influence(index, base)
+			emptied[index] = base
+			for d in directions:
+				inputs.append(influence(index, d))
+				patches.append((index, d))
+
+		if not inputs:
+			if not t:
+				tried[0] = 0
+				yield bytes(emptied)
+			continue
+
+		system = subsetxor.System(inputs)
+		combo = system.combination(t)
+		if combo is None:
+			continue
+
+		def flip(combo):
+			for (i, (index, d)) in enumerate(patches):
+				if combo & (1<<i):
+					emptied[index] ^= d
+
+		flip(combo)
+		tried[0] = 0
+		yield bytes(emptied)
+
+		for i in range(1, 1<<len(system.nullspace)):
+			# gray code, as in SolvePlan.solutions()
+			flip(system.nullspace[(i & -i).bit_length() - 1])
+			yield bytes(emptied)
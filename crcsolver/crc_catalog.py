@@ -114,3 +114,77 @@ database = [
 {'name':'CRC-82/DARC', 'width':82, 'poly':0x0308c0111011401440411, 'init':0x000000000000000000000, 'refin':True, 'refout':True, 'xorout':0x000000000000000000000, 'check':0x09ea83f625023801fd612, 'residue':0x000000000000000000000}
 ]
 
+
+# alternative names, also from the catalogue, mapped to the names above
+aliases = {
+'CRC-4/ITU':'CRC-4/G-704',
+'CRC-5/ITU':'CRC-5/G-704',
+'CRC-6/ITU':'CRC-6/G-704',
+'CRC-7':'CRC-7/MMC',
+'CRC-8':'CRC-8/SMBUS',
+'CRC-8/AES':'CRC-8/TECH-3250',
+'CRC-8/EBU':'CRC-8/TECH-3250',
+'CRC-8/ITU':'CRC-8/I-432-1',
+'CRC-8/MAXIM':'CRC-8/MAXIM-DOW',
+'DOW-CRC':'CRC-8/MAXIM-DOW',
+'CRC-10':'CRC-10/ATM',
+'CRC-10/I-610':'CRC-10/ATM',
+'CRC-11':'CRC-11/FLEXRAY',
+'CRC-12/3GPP':'CRC-12/UMTS',
+'X-CRC-12':'CRC-12/DECT',
+'CRC-15':'CRC-15/CAN',
+'ARC':'CRC-16/ARC',
+'CRC-16':'CRC-16/ARC',
+'CRC-16/LHA':'CRC-16/ARC',
+'CRC-IBM':'CRC-16/ARC',
+'CRC-16/BUYPASS':'CRC-16/UMTS',
+'CRC-16/VERIFONE':'CRC-16/UMTS',
+'R-CRC-16':'CRC-16/DECT-R',
+'X-CRC-16':'CRC-16/DECT-X',
+'CRC-16/DARC':'CRC-16/GENIBUS',
+'CRC-16/EPC':'CRC-16/GENIBUS',
+'CRC-16/EPC-C1G2':'CRC-16/GENIBUS',
+'CRC-16/I-CODE':'CRC-16/GENIBUS',
+'CRC-16/AUTOSAR':'CRC-16/IBM-3740',
+'CRC-16/CCITT-FALSE':'CRC-16/IBM-3740',
+'CRC-16/ISO-HDLC':'CRC-16/IBM-SDLC',
+'CRC-16/ISO-IEC-14443-3-B':'CRC-16/IBM-SDLC',
+'CRC-16/X-25':'CRC-16/IBM-SDLC',
+'CRC-B':'CRC-16/IBM-SDLC',
+'X-25':'CRC-16/IBM-SDLC',
+'CRC-A':'CRC-16/ISO-IEC-14443-3-A',
+'CRC-16/CCITT':'CRC-16/KERMIT',
+'CRC-16/CCITT-TRUE':'CRC-16/KERMIT',
+'CRC-16/V-41-LSB':'CRC-16/KERMIT',
+'CRC-CCITT':'CRC-16/KERMIT',
+'KERMIT':'CRC-16/KERMIT',
+'CRC-16/MAXIM':'CRC-16/MAXIM-DOW',
+'MODBUS':'CRC-16/MODBUS',
+'CRC-16/IEC-61158-2':'CRC-16/PROFIBUS',
+'CRC-16/AUG-CCITT':'CRC-16/SPI-FUJITSU',
+'CRC-16/ACORN':'CRC-16/XMODEM',
+'CRC-16/LTE':'CRC-16/XMODEM',
+'CRC-16/V-41-MSB':'CRC-16/XMODEM',
+'XMODEM':'CRC-16/XMODEM',
+'ZMODEM':'CRC-16/XMODEM',
+'CRC-24':'CRC-24/OPENPGP',
+'CRC-32':'CRC-32/ISO-HDLC',
+'CRC-32/ADCCP':'CRC-32/ISO-HDLC',
+'CRC-32/V-42':'CRC-32/ISO-HDLC',
+'CRC-32/XZ':'CRC-32/ISO-HDLC',
+'PKZIP':'CRC-32/ISO-HDLC',
+'CRC-32Q':'CRC-32/AIXM',
+'CRC-32/AAL5':'CRC-32/BZIP2',
+'CRC-32/DECT-B':'CRC-32/BZIP2',
+'B-CRC-32':'CRC-32/BZIP2',
+'CKSUM':'CRC-32/CKSUM',
+'CRC-32/POSIX':'CRC-32/CKSUM',
+'CRC-32/BASE91-C':'CRC-32/ISCSI',
+'CRC-32/CASTAGNOLI':'CRC-32/ISCSI',
+'CRC-32/INTERLAKEN':'CRC-32/ISCSI',
+'CRC-32C':'CRC-32/ISCSI',
+'JAMCRC':'CRC-32/JAMCRC',
+'XFER':'CRC-32/XFER',
+'CRC-64':'CRC-64/ECMA-182',
+'CRC-64/GO-ECMA':'CRC-64/XZ',
+}
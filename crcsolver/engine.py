@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+
+# table driven crc computation
+#
+# the generalized algorithm in main.compute() shifts one bit at a time, here
+# whole bytes are consumed through a 256-entry table that is built once per
+# (width, poly, refin) and then reused
+#
+# registers are kept in whichever orientation makes the byte step cheapest:
+#   refin=True  -> register is reflected, bytes enter at the lsb
+#   refin=False -> register is widened to at least 8 bits, bytes enter at the msb
+#
+# each engine also picks, once, the kernel its bytes go through: registers of
+# at most 64 bits use a native kernel (machine integers, in C) where one exists
+# for the (width, poly, refin), everything else, including registers wider
+# than 64 bits, goes through the table loop below on python ints
+#
+# native kernels come from the standard library or, when it was built, the
+# optional _native extension (see _native.c), which covers every width up to
+# 64 bits and is checked against the whole catalog at import
+
+import zlib
+import binascii
+from array import array
+
+try:
+	from . import _native as native
+except ImportError:
+	native = None
+
+from . import crc_catalog
+from . import polynomial
+
+def reflect(x, width):
+	''' the low width bits of x in reverse order, through the string of bits:
+		a leading 1 at bit width keeps the zeros, and is dropped with the 0b '''
+	return int(bin((x & ((1<<width)-1)) | (1<<width))[:2:-1], 2)
+
+def register_width(width, refin):
+	''' width of the working register, registers narrower than a byte are
+		widened (when non-reflected) so a whole byte can be xor'd in '''
+	if refin:
+		return width
+	return max(width, 8)
+
+def make_table(width, poly, refin):
+	''' table[i] is the register after clocking byte i into a zero register '''
+	table = []
+
+	if refin:
+		rpoly = reflect(poly, width)
+		for i in range(256):
+			reg = i
+			for k in range(8):
+				if reg & 1:
+					reg = (reg >> 1) ^ rpoly
+				else:
+					reg = reg >> 1
+			table.append(reg)
+	else:
+		rwidth = register_width(width, refin)
+		rpoly = poly << (rwidth - width)
+		msb_mask = 1<<(rwidth-1)
+		for i in range(256):
+			reg = i << (rwidth-8)
+			for k in range(8):
+				if reg & msb_mask:
+					reg = ((reg ^ msb_mask) << 1) ^ rpoly
+				else:
+					reg = reg << 1
+			table.append(reg)
+
+	return table
+
+tables = {}
+def get_table(width, poly, refin):
+	''' tables are cached, algorithms that share (width, poly, refin) share a table '''
+	key = (width, poly, refin)
+	if not key in tables:
+		tables[key] = make_table(width, poly, refin)
+	return tables[key]
+
+def initial(entry):
+	''' the register before any data is clocked in '''
+	width = entry['width']
+	if entry['refin']:
+		return reflect(entry['init'], width)
+	return entry['init'] << (register_width(width, False) - width)
+
+def finalize(entry, reg):
+	''' convert the register to a checksum, applying xorout and refout '''
+	width = entry['width']
+	if entry['refin']:
+		checksum = reflect(reg, width)
+	else:
+		checksum = reg >> (register_width(width, False) - width)
+
+	checksum ^= entry['xorout']
+
+	if entry['refout']:
+		checksum = reflect(checksum, width)
+
+	return checksum
+
+def as_bytes(data):
+	''' view any buffer protocol object (memoryview, bytearray, array, mmap,
+		numpy array, ...) as a flat, contiguous sequence of bytes, without
+		copying unless it is strided (eg: memoryview(data)[::2], a numpy slice)
+		non-buffer iterables of byte values are passed through '''
+	if type(data) in [bytes, bytearray]:
+		return data
+	try:
+		view = memoryview(data)
+	except TypeError:
+		return data
+	if not view.c_contiguous:
+		# neither cast() nor the native kernels take strided memory
+		return view.tobytes()
+	if view.format != 'B' or view.ndim != 1:
+		view = view.cast('B')
+	return view
+
+def update(table, reg, data, width, refin):
+	''' clock data into the register a byte at a time '''
+	if refin:
+		for b in data:
+			reg = table[(reg ^ b) & 0xFF] ^ (reg >> 8)
+	else:
+		rwidth = register_width(width, refin)
+		shift = rwidth - 8
+		mask = (1<<rwidth) - 1
+		for b in data:
+			reg = table[((reg >> shift) ^ b) & 0xFF] ^ ((reg << 8) & mask)
+	return reg
+
+def zlib_kernel(reg, data):
+	''' zlib complements the register on the way in and out '''
+	return zlib.crc32(data, reg ^ 0xFFFFFFFF) ^ 0xFFFFFFFF
+
+def hqx_kernel(reg, data):
+	return binascii.crc_hqx(data, reg)
+
+# (width, poly, refin) -> process(reg, data) working on our register
+native_kernels = {
+	(32, 0x04C11DB7, True): zlib_kernel,
+	(16, 0x1021, False): hqx_kernel,
+}
+
+def compiled_kernel(width, poly, refin):
+	''' the _native table loop, slicing-by-8 over tables built in C '''
+	tables = array('Q', native.make_tables(width, poly, refin, 8))
+	rwidth = register_width(width, refin)
+	return lambda reg, data: native.update(tables, reg, data, rwidth, refin)
+
+def select_kernel(width, poly, refin):
+	''' native kernel for the register, or None to use the table loop
+		zlib beats the extension's slicing-by-8, which beats crc_hqx '''
+	if register_width(width, refin) > 64:
+		return None
+	kernel = native_kernels.get((width, poly, refin))
+	if native and kernel is not zlib_kernel:
+		return compiled_kernel(width, poly, refin)
+	return kernel
+
+def verify_native():
+	''' the extension must reproduce every catalog check value, with the
+		slicing loop and its byte at a time tail both exercised '''
+	for entry in crc_catalog.database:
+		(width, refin) = (entry['width'], entry['refin'])
+		if register_width(width, refin) > 64:
+			continue
+		kernel = compiled_kernel(width, entry['poly'], refin)
+		if finalize(entry, kernel(initial(entry), b'123456789')) != entry['check']:
+			return False
+
+	pivots = {3: (0xB, 1), 2: (0x4, 2)}
+	return native.xor_reduce(pivots, 0xF, 0) == (0x0, 3)
+
+if native and not verify_native():
+	native = None
+
+class CrcEngine():
+	''' a catalog entry or parameter dict, compiled to its tables '''
+	def __init__(self, entry):
+		self.entry = entry
+		self.name = entry.get('name')
+		self.width = entry['width']
+		self.poly = entry['poly']
+		self.refin = entry['refin']
+		self.refout = entry['refout']
+		self.table = get_table(self.width, self.poly, self.refin)
+		self.kernel = select_kernel(self.width, self.poly, self.refin)
+
+		# finalize() without the per call reflections: the register is reflected
+		# once for refin and once more for refout, which cancel when both are
+		# set, and xorout is applied before refout so it is stored reflected
+		self.register = initial(entry)
+		self.shift = 0 if self.refin else register_width(self.width, False) - self.width
+		self.final_xor = reflect(entry['xorout'], self.width) if self.refout else entry['xorout']
+
+	def initial(self):
+		return self.register
+
+	def finalize(self, reg):
+		''' convert the register to a checksum, as finalize() does '''
+		checksum = reg >> self.shift
+		if self.refin != self.refout:
+			checksum = reflect(checksum, self.width)
+		return checksum ^ self.final_xor
+
+	def unfinalize(self, checksum):
+		''' recover the register from a checksum, inverse of finalize() '''
+		checksum ^= self.final_xor
+		if self.refin != self.refout:
+			checksum = reflect(checksum, self.width)
+		return checksum << self.shift
+
+	def process(self, reg, data):
+		''' clock data into the register, buffers go through the native kernel
+			when there is one '''
+		data = as_bytes(data)
+		if self.kernel and type(data) in [bytes, bytearray, memoryview]:
+			return self.kernel(reg, data)
+		return update(self.table, reg, data, self.width, self.refin)
+
+	def compute(self, data):
+		return self.finalize(self.process(self.initial(), data))
+
+	def update(self, checksum, data):
+		''' continue a checksum with more data, like binascii.crc32(data, value) '''
+		return self.finalize(self.process(self.unfinalize(checksum), data))
+
+	def influence(self, length, unknowns):
+		''' the change in checksum from setting each unknown bit of a length
+			byte message, without evaluating the crc
+
+			a lone 1 bit k bits from the end of the stream leaves x^(width+k) mod P
+			in the register, bits enter msb first unless refin '''
+		(width, nbits) = (self.width, 8*length)
+
+		exponents = []
+		for position in unknowns:
+			if self.refin:
+				position = 8*(position//8) + 7 - position%8
+			exponents.append(width + nbits - 1 - position)
+
+		powers = polynomial.xpowmods(exponents, self.poly, width)
+
+		result = [powers[k] for k in exponents]
+		if self.entry['refout']:
+			result = [reflect(x, width) for x in result]
+		return result
+
+	def solve(self, data, unknowns, desired):
+		from . import main
+		return main.solve(data, unknowns, desired, self)
+
+	def __call__(self, data):
+		return self.compute(data)
+
+	def __repr__(self):
+		if self.name:
+			return '<CrcEngine %s>' % self.name
+		return '<CrcEngine width=%d poly=0x%X>' % (self.width, self.poly)
+
+def params_key(entry):
+	return tuple(entry[k] for k in ['width', 'poly', 'init', 'refin', 'refout', 'xorout'])
+
+# catalog names (and aliases), upper cased -> entry
+index = {e['name'].upper(): e for e in crc_catalog.database}
+for (alias, name) in crc_catalog.aliases.items():
+	index[alias.upper()] = index[name.upper()]
+
+# params_key() -> catalog entry, so a parameter dict matching a catalog
+# algorithm builds the named engine whichever is looked up first
+catalog = {params_key(e): e for e in crc_catalog.database}
+
+# params_key() -> engine, so aliases and equal parameter dicts share an engine
+engines = {}
+def lookup(crc_name):
+	''' engine for a catalog name or alias (any case), parameter dict, or engine '''
+	if isinstance(crc_name, CrcEngine):
+		return crc_name
+
+	if type(crc_name) == str:
+		entry = index.get(crc_name.upper())
+		if not entry:
+			raise Exception('unrecognized algorithm: %s' % crc_name)
+	else:
+		entry = crc_name
+
+	key = params_key(entry)
+	if not key in engines:
+		engines[key] = CrcEngine(catalog.get(key, entry))
+	return engines[key]
+
+def compute(data, entry):
+	''' table driven equivalent of main.compute() for a catalog entry or parameter dict '''
+	return lookup(entry).compute(data)
@@ -1,65 +1,341 @@
 import sys
 import struct
 import random
+import inspect
+import numbers
 import binascii
 import functools
+import itertools
+import collections
 
+from . import batch
+from . import engine
+from . import parallel
 from . import subsetxor
-from . import crc_catalog
-
-def solve(data, unknowns, desired, crc_func):
-	# crc_func can be a function or a name from the crc_catalog
-	if type(crc_func) == str:
-		crc_name = crc_func
-		crc_func = lambda x: compute(x, crc_name)
-
-	zeroed = [0]*len(data)
-	csum_nulls = crc_func(bytes(zeroed))
-
-	# calculate subsetxor target
-	emptied = list(data)
-	for position in unknowns:
-		bit = 1<<(7-position%8)
-		emptied[position//8] &= ~bit
-	csum_emptied = crc_func(bytes(emptied))
-	target = csum_emptied ^ desired
-
-	# calculate subsetxor inputs
-	inputs = []
-	for position in unknowns:
-		bit = 1<<(7-position%8)
-		# set bit
-		zeroed[position//8] |= bit
-
-		csum = crc_func(bytes(zeroed))
-		inputs.append(csum_nulls ^ csum)
-
-		# clear bit
-		zeroed[position//8] ^= bit
-
-	# solve subsetxor
-	selector = subsetxor.solve(inputs, target)
-	if selector == []:
-		return None
-
-	# set the results on the data, return it
-	result = emptied
-	for i in range(len(selector)):
-		if not selector[i]:
-			continue
-		position = unknowns[i]
-		bit = 1<<(7-position%8)
-		result[position//8] |= bit
-
-	return bytes(result)
-
-def reflect(x, width):
-	y = 0
-	for i in range(width):
-		y <<= 1
-		y |= (x & 1)
-		x >>= 1
-	return y
+from . import constraints
+from .engine import reflect
+
+class SolvePlan():
+	''' everything about a solve that depends only on the layout (message
+		length, unknown bit positions, algorithm), computed once so that apply()
+		costs a crc evaluation and a few xors per record
+
+		solutions are kept as combos, bitfields over the unknowns, and only
+		written into the message by flip(), so a plan's size follows the number
+		of unknowns rather than the span of bytes holding them '''
+	def __init__(self, length, unknowns, crc_func, model=None):
+		self.length = length
+		self.unknowns = tuple(unknowns)
+		self.crc_func = crc_func
+
+		for position in self.unknowns:
+			if position < 0 or position >= 8*length:
+				raise Exception('unknown bit %d is outside the %d byte message' % (position, length))
+
+		# unknown i is bit masks[i] of byte offsets[i], keep maps each byte
+		# holding unknowns to the mask of its known bits
+		self.offsets = [position//8 for position in self.unknowns]
+		self.masks = [1<<(7-position%8) for position in self.unknowns]
+		self.keep = {}
+		for (offset, mask) in zip(self.offsets, self.masks):
+			self.keep[offset] = self.keep.get(offset, 0xFF) & ~mask
+
+		# calculate subsetxor inputs
+		if isinstance(crc_func, engine.CrcEngine):
+			# known algorithm: influence of each bit is x^k mod P
+			self.inputs = crc_func.influence(length, self.unknowns)
+		else:
+			# black box: influence of each bit is measured, once per length
+			model = model or affine_model(crc_func, length)
+			self.inputs = model.influence(self.unknowns)
+		inputs = self.inputs
+
+		# pivots of the elimination, each carrying the combo it sets
+		self.system = subsetxor.System(inputs)
+
+		# pivots grouped by target byte, lanes[k][v] is the (check, combo) for
+		# byte k of the target having value v, so applying a target is a lookup
+		# and xor per byte rather than a test per bit
+		self.lanes = []
+		for k in range((self.system.width + 7) // 8):
+			lane = [(0, 0)] * 256
+			for (mask, row, combo) in self.system.pivots:
+				bit = (mask >> (8*k)) & 0xFF
+				if not bit:
+					continue
+				lane = [(c ^ row, p ^ combo) if v & bit else (c, p) for (v, (c, p)) in enumerate(lane)]
+			self.lanes.append(lane)
+
+		# null combos, unknowns whose flipping together leaves the crc unchanged
+		self.nullspace = self.system.nullspace
+
+	def flip(self, emptied, combo):
+		''' xor the unknown bits selected by combo into the bytearray emptied '''
+		for (i, bit) in enumerate(bin(combo)[:1:-1]):
+			if bit == '1':
+				emptied[self.offsets[i]] ^= self.masks[i]
+
+	def apply(self, data, desired, checksum=None):
+		''' data with the unknown bits set so its crc is desired, or None
+			checksum is crc_func of empty(data), if the caller already has it '''
+		particular = self.particular(data, desired, checksum)
+		if not particular:
+			return None
+		(emptied, combo) = particular
+		self.flip(emptied, combo)
+		return bytes(emptied)
+
+	def solutions(self, data, desired):
+		''' generate every distinct solution, in gray code order over the
+			nullspace so each costs a single xor after the first
+			unknowns should not repeat, or solutions will too '''
+		particular = self.particular(data, desired)
+		if not particular:
+			return
+		(emptied, combo) = particular
+
+		self.flip(emptied, combo)
+		yield bytes(emptied)
+
+		for i in range(1, 1<<len(self.nullspace)):
+			# gray code i^(i>>1) differs from its predecessor in the lowest set bit of i
+			self.flip(emptied, self.nullspace[(i & -i).bit_length() - 1])
+			yield bytes(emptied)
+
+	def empty(self, data):
+		''' data as a bytearray with the unknowns cleared '''
+		if len(data) != self.length:
+			raise Exception('plan is for %d byte messages, got %d' % (self.length, len(data)))
+
+		emptied = bytearray(data)
+		for (offset, keep) in self.keep.items():
+			emptied[offset] &= keep
+		return emptied
+
+	def target(self, data, desired, checksum=None):
+		''' (data as a bytearray with the unknowns cleared, the xor of
+			influences that the unknowns must produce) '''
+		emptied = self.empty(data)
+		if checksum is None:
+			checksum = self.crc_func(bytes(emptied))
+
+		# calculate subsetxor target
+		return (emptied, checksum ^ desired)
+
+	def particular(self, data, desired, checksum=None):
+		''' (data as a bytearray with the unknowns cleared, combo of one
+			solution) or None '''
+		(emptied, target) = self.target(data, desired, checksum)
+		if target.bit_length() > self.system.width:
+			return None
+
+		(check, combo) = (0, 0)
+		for (k, lane) in enumerate(self.lanes):
+			(c, p) = lane[(target >> (8*k)) & 0xFF]
+			check ^= c
+			combo ^= p
+		if check != target:
+			return None
+
+		return (emptied, combo)
+
+# plans are cached on the layout, most recently used last, the cache is a
+# dict rather than lru_cache so that a plan can be built on a model the
+# caller has already measured (through an executor, or awaited)
+PLAN_CACHE = 64
+plans = collections.OrderedDict()
+
+def get_plan(length, unknowns, crc_func, model=None):
+	''' the cached plan for the layout, built on model if given, or a new
+		plan for an unhashable crc_func, eg: an instance of a dataclass with
+		__call__ '''
+	key = (length, unknowns, crc_func)
+	try:
+		plan = plans.pop(key, None)
+	except TypeError:
+		return SolvePlan(length, unknowns, crc_func, model)
+
+	if plan is None:
+		plan = SolvePlan(length, unknowns, crc_func, model)
+	plans[key] = plan
+	while len(plans) > PLAN_CACHE:
+		plans.popitem(last=False)
+	return plan
+
+def prepare(length, unknowns, crc_func, executor=None):
+	''' a reusable SolvePlan, plans are cached on the layout
+		executor, a concurrent.futures thread or process pool, evaluates the
+		probes of a black box crc_func concurrently '''
+	# crc_func can be a function, a name from the crc_catalog, or a parameter dict
+	if type(crc_func) in [str, dict]:
+		crc_func = engine.lookup(crc_func)
+	unknowns = tuple(unknowns)
+	model = None
+	if executor and not isinstance(crc_func, engine.CrcEngine):
+		model = affine_model(crc_func, length)
+		model.influence(unknowns, executor)
+	return get_plan(length, unknowns, crc_func, model)
+
+def solve(data, unknowns, desired, crc_func, allowed=None, executor=None):
+	''' allowed constrains the bytes holding unknowns, see solutions() '''
+	if allowed is not None:
+		return next(solutions(data, unknowns, desired, crc_func, allowed, executor), None)
+	return prepare(len(data), unknowns, crc_func, executor).apply(data, desired)
+
+async def solve_async(data, unknowns, desired, crc_func):
+	''' solve() for a coroutine function crc_func, its probes are awaited
+		concurrently '''
+	unknowns = tuple(unknowns)
+	model = affine_model(crc_func, len(data))
+	await model.influence_async(unknowns)
+
+	# the model is complete, so building the plan awaits nothing
+	plan = get_plan(len(data), unknowns, crc_func, model)
+	emptied = plan.empty(data)
+	return plan.apply(data, desired, await crc_func(bytes(emptied)))
+
+def solutions(data, unknowns, desired, crc_func, allowed=None, executor=None):
+	''' generate every distinct solution, lazily
+		allowed is a predicate on byte values, a charset (str, bytes, or ints),
+		or a dict of byte index -> either, constraining the bytes holding unknowns '''
+	unknowns = list(dict.fromkeys(unknowns))
+	plan = prepare(len(data), unknowns, crc_func, executor)
+	if allowed is not None:
+		return constraints.solutions(plan, data, desired, allowed)
+	return plan.solutions(data, desired)
+
+def solve_many(records, unknowns, desired, crc_func, executor=None):
+	''' solve() over many records sharing one layout, desired is one checksum
+		for all records or a sequence/iterator of them, exactly one per record
+		returns a list, with None for records that cannot be solved
+		records (or an N x L uint8 array) are solved together, see batch.py '''
+	# records and targets are paired up front, the batch needs them all
+	numpy = batch.get_numpy()
+	if not (numpy and isinstance(records, numpy.ndarray)):
+		records = list(records)
+	if isinstance(desired, numbers.Integral):
+		desired = [int(desired)] * len(records)
+	else:
+		desired = [int(d) for d in itertools.islice(desired, len(records)+1)]
+	if len(desired) != len(records):
+		raise Exception('desired needs one checksum for each of the %d records' % len(records))
+	if not len(records):
+		return []
+
+	plan = prepare(len(records[0]), unknowns, crc_func, executor)
+	return batch.solve(plan, records, desired)
+
+# random messages each measurement is checked against
+SPOT_CHECKS = 4
+
+class AffineModel():
+	''' a black box crc_func at one message length, as the checksum of the zero
+		message xor the influence of each set bit, crc functions being affine
+
+		influences are measured as they are first asked for and kept, so later
+		plans for the same length only evaluate crc_func for new bits, and all
+		evaluations of one measurement are independent so they can run
+		concurrently '''
+	def __init__(self, crc_func, length):
+		self.crc_func = crc_func
+		self.length = length
+		self.constant = None
+		# bit position -> influence
+		self.influences = {}
+
+	def pending(self, positions):
+		''' (positions not yet measured, messages that measure them), the
+			messages being the zero message if it is not yet known, one per
+			position, then SPOT_CHECKS random messages over the positions '''
+		for position in positions:
+			if position < 0 or position >= 8*self.length:
+				raise Exception('unknown bit %d is outside the %d byte message' % (position, self.length))
+
+		missing = [p for p in dict.fromkeys(positions) if not p in self.influences]
+		if not missing:
+			return (missing, [])
+
+		messages = []
+		if self.constant is None:
+			messages.append(bytes(self.length))
+		for position in missing:
+			message = bytearray(self.length)
+			message[position//8] = 1<<(7-position%8)
+			messages.append(bytes(message))
+		for i in range(SPOT_CHECKS):
+			message = bytearray(self.length)
+			for position in missing:
+				if random.getrandbits(1):
+					message[position//8] |= 1<<(7-position%8)
+			messages.append(bytes(message))
+		return (missing, messages)
+
+	def record(self, missing, messages, checksums):
+		''' take in crc_func of each pending() message, the spot checks must
+			agree with the model or nothing is kept '''
+		checksums = list(checksums)
+		if self.constant is None:
+			self.constant = checksums.pop(0)
+			messages = messages[1:]
+
+		for (position, csum) in zip(missing, checksums):
+			self.influences[position] = csum ^ self.constant
+
+		for (message, csum) in zip(messages[len(missing):], checksums[len(missing):]):
+			if csum != self.predict(message):
+				for position in missing:
+					del self.influences[position]
+				raise Exception('crc_func is not affine over the unknown bits of a %d byte message' % self.length)
+
+	def influence(self, positions, executor=None):
+		''' influence of each position, measuring those not yet known, through
+			executor.map() if given '''
+		(missing, messages) = self.pending(positions)
+		if messages:
+			mapper = executor.map if executor else map
+			checksums = list(mapper(self.crc_func, messages))
+			if any(inspect.isawaitable(c) for c in checksums):
+				for c in checksums:
+					if inspect.iscoroutine(c):
+						c.close()
+				raise Exception('crc_func is a coroutine function, use solve_async()')
+			self.record(missing, messages, checksums)
+		return [self.influences[p] for p in positions]
+
+	async def influence_async(self, positions):
+		''' influence() for a coroutine function crc_func '''
+		# imported here rather than with the module, asyncio is slow to import
+		import asyncio
+
+		(missing, messages) = self.pending(positions)
+		if messages:
+			checksums = await asyncio.gather(*[self.crc_func(m) for m in messages])
+			self.record(missing, messages, checksums)
+		return [self.influences[p] for p in positions]
+
+	def predict(self, data):
+		''' the checksum of data from the model, every set bit must be measured '''
+		result = self.constant
+		for (i, b) in enumerate(data):
+			if not b:
+				continue
+			for k in range(8):
+				if b & (0x80 >> k):
+					result ^= self.influences[8*i + k]
+		return result
+
+@functools.lru_cache(maxsize=64)
+def cached_model(crc_func, length):
+	return AffineModel(crc_func, length)
+
+def affine_model(crc_func, length):
+	''' models are cached on (crc_func, length), an unhashable crc_func gets
+		a new one '''
+	try:
+		hash(crc_func)
+	except TypeError:
+		return AffineModel(crc_func, length)
+	return cached_model(crc_func, length)
 
 def bit_gen(data, msb_first):
 	for b in data:
@@ -70,14 +346,25 @@ def bit_gen(data, msb_first):
 			yield b & 1
 			b >>= 1
 
-def compute(data, crc_name):
-	if type(crc_name) == str:
-		entry = [e for e in crc_catalog.database if e['name']==crc_name]
-		if not entry:
-			raise Exception('unrecognized algorithm: %s' % crc_name)
-		entry = entry[0]
-	else:
-		entry = crc_name
+def lookup(crc_name):
+	return engine.lookup(crc_name).entry
+
+def compute(data, crc_name, workers=None):
+	if workers and workers > 1:
+		return parallel.compute(data, crc_name, workers)
+	return engine.lookup(crc_name).compute(data)
+
+def compute_batch(messages, crc_name):
+	''' checksums of many equal length messages (an N x L uint8 array or a
+		list of buffers), see batch.py '''
+	return batch.compute(messages, crc_name)
+
+def compute_file(path, crc_name, workers=None):
+	return parallel.compute_file(path, crc_name, workers or 1)
+
+def compute_bitwise(data, crc_name):
+	''' reference implementation, one bit at a time '''
+	entry = lookup(crc_name)
 
 	poly = entry['poly']
 	checksum = entry['init']
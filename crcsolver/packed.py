@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+
+# packed BitMatrix backend, rows as numpy uint64 words, eliminated with the
+# method of four russians (M4RI)
+#
+# columns are taken k at a time: up to k pivots are found looking only at
+# those k bits of each row, the pivot rows are reduced among themselves, all
+# 2^k xor combinations of them are tabulated, then every other row is cleared
+# of those pivot columns with a single table lookup and row xor, instead of
+# up to k separate row xors
+#
+# numpy is optional, without it BitMatrix keeps using its own elimination, and
+# is imported when first needed, as importing it takes longer than all of
+# crcsolver
+
+import functools
+
+@functools.lru_cache(maxsize=None)
+def get_numpy():
+	''' the numpy module, or None if it is not installed '''
+	try:
+		import numpy
+	except ImportError:
+		return None
+	return numpy
+
+# columns per table
+K = 8
+
+def words(ncols):
+	return max(1, -(-ncols // 64))
+
+def pack(rows, ncols):
+	''' list of row integers -> (len(rows), words(ncols)) uint64 array, column 0
+		(the msb of each row) in the msb of word 0 '''
+	numpy = get_numpy()
+	nwords = words(ncols)
+	pad = 64*nwords - ncols
+	raw = b''.join((row << pad).to_bytes(8*nwords, 'big') for row in rows)
+	return numpy.frombuffer(raw, dtype='>u8').astype(numpy.uint64).reshape(len(rows), nwords)
+
+def unpack(array, ncols):
+	''' inverse of pack() '''
+	nwords = array.shape[1]
+	pad = 64*nwords - ncols
+	raw = array.astype('>u8').tobytes()
+	step = 8*nwords
+	return [int.from_bytes(raw[i:i+step], 'big') >> pad for i in range(0, len(raw), step)]
+
+def column(array, col):
+	''' bit col of every row, as a uint64 array of 0/1 '''
+	numpy = get_numpy()
+	return (array[:, col//64] >> numpy.uint64(63 - col%64)) & numpy.uint64(1)
+
+def row_echelon(rows, ncols, record_rows=None, record_ncols=0):
+	''' reduced row echelon form of rows, which are ncols wide
+		record_rows (record_ncols wide) receive the same row operations
+		returns (echelon rows, record rows, pivot columns) '''
+	numpy = get_numpy()
+	nrows = len(rows)
+	matrix = pack(rows, ncols)
+	if record_rows is not None:
+		matrix = numpy.hstack([matrix, pack(record_rows, record_ncols)])
+
+	pos = 0
+	pivots = []
+	for start in range(0, ncols, K):
+		if pos >= nrows:
+			break
+		block = list(range(start, min(start+K, ncols)))
+
+		# block bits of the candidate rows, block column 0 in the msb
+		bits = numpy.zeros(nrows-pos, dtype=numpy.uint64)
+		for c in block:
+			bits = (bits << numpy.uint64(1)) | column(matrix[pos:], c)
+
+		# find pivots using only the block bits, mirroring swaps in the matrix
+		found = []
+		for (j, c) in enumerate(block):
+			mask = numpy.uint64(1 << (len(block)-1-j))
+			n = len(found)
+			hits = numpy.flatnonzero(bits[n:] & mask)
+			if not hits.size:
+				continue
+			i = n + hits[0]
+			if i != n:
+				bits[[i, n]] = bits[[n, i]]
+				matrix[[pos+i, pos+n]] = matrix[[pos+n, pos+i]]
+			below = bits[n+1:]
+			below[(below & mask) != 0] ^= bits[n]
+			found.append(c)
+			if pos + len(found) >= nrows:
+				break
+
+		if not found:
+			continue
+
+		# reduce the pivot rows among themselves so each has a single pivot bit
+		rows_ = matrix[pos:pos+len(found)]
+		for (j, c) in enumerate(found):
+			others = numpy.flatnonzero(column(rows_, c))
+			if not others.size:
+				continue
+			# first row with the bit among j.. becomes row j
+			candidates = others[others >= j]
+			i = candidates[0]
+			if i != j:
+				rows_[[i, j]] = rows_[[j, i]]
+			for o in numpy.flatnonzero(column(rows_, c)):
+				if o != j:
+					rows_[o] ^= rows_[j]
+
+		# every xor combination of the pivot rows, indexed by pivot bits
+		table = numpy.zeros((1<<len(found), matrix.shape[1]), dtype=numpy.uint64)
+		for j in range(len(found)):
+			table[1<<j : 2<<j] = table[0 : 1<<j] ^ rows_[j]
+
+		# clear the pivot columns from every other row with one lookup each
+		index = numpy.zeros(nrows, dtype=numpy.uint64)
+		for (j, c) in enumerate(found):
+			index |= column(matrix, c) << numpy.uint64(j)
+		index[pos:pos+len(found)] = 0
+		matrix ^= table[index.astype(numpy.intp)]
+
+		pivots += found
+		pos += len(found)
+
+	nwords = words(ncols)
+	echelon = unpack(matrix[:, :nwords], ncols)
+	record = None
+	if record_rows is not None:
+		record = unpack(matrix[:, nwords:], record_ncols)
+	return (echelon, record, pivots)
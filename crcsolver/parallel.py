@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+
+# multi-core checksums
+#
+# the input is split into one chunk per worker, each chunk is checksummed in
+# a process pool, then the partial checksums are folded with crc_combine()
+#
+# catalog screening instead splits the entries among the workers, each
+# checking the same samples against its share
+#
+# concurrent.futures is imported only when a pool is started, importing the
+# process pool costs more than a small checksum
+
+import os
+import mmap
+
+from . import engine
+from .combine import crc_combine
+
+# below this many bytes per worker the pool costs more than it saves
+MIN_CHUNK = 1<<16
+
+def chunk_bounds(length, nchunks):
+	''' split [0, length) into nchunks contiguous (start, end) pairs '''
+	nchunks = max(1, min(nchunks, length // MIN_CHUNK))
+	if length == 0:
+		return [(0, 0)]
+	step = -(-length // nchunks)
+	return [(i, min(i+step, length)) for i in range(0, length, step)]
+
+def compute_chunk(data, entry):
+	return engine.lookup(entry).compute(data)
+
+def compute_file_chunk(path, start, end, entry):
+	''' checksum a byte range of a file through a memory map '''
+	if start == end:
+		return compute_chunk(b'', entry)
+
+	with open(path, 'rb') as fp:
+		with mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+			with memoryview(mm) as view:
+				if len(view) < end:
+					raise Exception('%s shrank while being read' % path)
+				return compute_chunk(view[start:end], entry)
+
+def fold(checksums, bounds, entry):
+	''' combine per-chunk checksums into the checksum of the whole '''
+	result = checksums[0]
+	for (csum, (start, end)) in zip(checksums[1:], bounds[1:]):
+		result = crc_combine(result, csum, end-start, entry)
+	return result
+
+def compute(data, crc_name, workers):
+	''' buffers go to the pool only for the table loops, handing a worker its
+		chunk costs a copy, which is no cheaper than a native kernel's pass '''
+	data = engine.as_bytes(data)
+	crc = engine.lookup(crc_name)
+	entry = crc.entry
+	bounds = chunk_bounds(len(data), workers)
+	if len(bounds) == 1 or crc.kernel:
+		return compute_chunk(data, entry)
+
+	from concurrent.futures import ProcessPoolExecutor
+	with ProcessPoolExecutor(max_workers=workers) as pool:
+		futures = [pool.submit(compute_chunk, bytes(data[start:end]), entry) for (start, end) in bounds]
+		checksums = [f.result() for f in futures]
+
+	return fold(checksums, bounds, entry)
+
+def compute_file(path, crc_name, workers):
+	''' the file is memory mapped rather than read, each worker maps it
+		and touches only its own range '''
+	entry = engine.lookup(crc_name).entry
+	bounds = chunk_bounds(os.path.getsize(path), workers)
+	if len(bounds) == 1:
+		return compute_file_chunk(path, bounds[0][0], bounds[0][1], entry)
+
+	from concurrent.futures import ProcessPoolExecutor
+	with ProcessPoolExecutor(max_workers=workers) as pool:
+		futures = [pool.submit(compute_file_chunk, path, start, end, entry) for (start, end) in bounds]
+		checksums = [f.result() for f in futures]
+
+	return fold(checksums, bounds, entry)
+
+def screen_batch(samples, entries):
+	''' positions within entries of those matching every sample '''
+	result = []
+	for (i, entry) in enumerate(entries):
+		crc = engine.lookup(entry)
+		if all(crc.compute(data) == checksum for (data, checksum) in samples):
+			result.append(i)
+	return result
+
+def screen(samples, entries, workers, limit=None):
+	''' entries matching every sample, checked in batches across a process
+		pool, pending batches are cancelled once limit matches are found
+		matches keep the order of entries, but with a limit which ones are
+		found first depends on scheduling '''
+	# engines are built before the pool starts so that forked workers share
+	# the tables rather than each rebuilding them
+	for entry in entries:
+		engine.lookup(entry)
+
+	nbatches = min(len(entries), 4*workers)
+	if nbatches <= 1:
+		matches = [entries[i] for i in screen_batch(samples, entries)]
+		return matches[:limit]
+
+	from concurrent.futures import ProcessPoolExecutor, as_completed
+	step = -(-len(entries) // nbatches)
+	found = []
+	with ProcessPoolExecutor(max_workers=workers) as pool:
+		futures = {pool.submit(screen_batch, samples, entries[start:start+step]): start for start in range(0, len(entries), step)}
+		for future in as_completed(futures):
+			found += [futures[future] + i for i in future.result()]
+			if limit and len(found) >= limit:
+				for f in futures:
+					f.cancel()
+				break
+
+	return [entries[i] for i in sorted(found)[:limit]]
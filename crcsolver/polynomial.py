@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+
+# arithmetic in GF(2)[x]/P
+#
+# polynomials are integers, bit i is the coefficient of x^i, P is given like
+# the catalog gives it: the x^width term is implied, poly holds the rest
+
+def mulx(a, poly, width):
+	''' a*x mod P '''
+	a <<= 1
+	if a >> width:
+		a ^= (1<<width) | poly
+	return a
+
+def mulmod(a, b, poly, width):
+	''' a*b mod P '''
+	result = 0
+	for i in range(b.bit_length()-1, -1, -1):
+		result = mulx(result, poly, width)
+		if (b >> i) & 1:
+			result ^= a
+	return result
+
+def xpowmod(k, poly, width):
+	''' x^k mod P by square and multiply '''
+	result = 1
+	base = mulx(1, poly, width)
+	while k:
+		if k & 1:
+			result = mulmod(result, base, poly, width)
+		base = mulmod(base, base, poly, width)
+		k >>= 1
+	return result
+
+def xpowmods(exponents, poly, width):
+	''' {k: x^k mod P} for many k, stepping between neighbouring exponents
+		with shifts when they are close, so runs cost O(1) each '''
+	result = {}
+	(prev, cur) = (0, 1)
+	for k in sorted(set(exponents)):
+		delta = k - prev
+		if delta <= width:
+			for i in range(delta):
+				cur = mulx(cur, poly, width)
+		else:
+			cur = mulmod(cur, xpowmod(delta, poly, width), poly, width)
+		result[k] = cur
+		prev = k
+	return result
+
+# the functions below take polynomials with every term present, eg: the full
+# P is (1<<width) | poly
+
+def divide(a, b):
+	''' (a // b, a % b) '''
+	(quotient, nbits) = (0, b.bit_length())
+	while a.bit_length() >= nbits:
+		shift = a.bit_length() - nbits
+		a ^= b << shift
+		quotient ^= 1 << shift
+	return (quotient, a)
+
+def gcd(a, b):
+	while b:
+		(a, b) = (b, divide(a, b)[1])
+	return a
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+
+# find crc parameters from sample (message, checksum) pairs, like reveng -s
+#
+# catalog entries are screened first with their table engines, then the
+# generalized parameter space is searched, for each refin/refout:
+#
+#   poly: with refout undone, a checksum is the crc of the message with zero
+#   init and xorout, which is M(x)*x^width mod P, xor terms that depend only on
+#   the length, init and xorout, so for two messages of one length
+#   D = (M1^M2)*x^width ^ (c1^c2) is a multiple of P, and P divides the gcd
+#   of every such D
+#
+#   init, xorout: with poly known, each checksum is
+#   crc0(m) ^ init*x^(8*len) ^ xorout mod P, linear in the 2*width unknown
+#   bits, so they are solved with subsetxor rather than searched, one block of
+#   equations per distinct message length (samples of a single length cannot
+#   tell init from xorout, init is then reported as 0)
+
+from . import engine
+from . import parallel
+from . import polynomial
+from . import subsetxor
+from . import crc_catalog
+from .engine import reflect
+
+# gcd/P of at most this degree is searched for by trial division, so the gcd
+# needs a few same length pairs to come out close to P itself
+MAX_COFACTOR = 12
+
+# the widest searched when no width is given
+MAX_WIDTH = 64
+
+reflected_bytes = bytes(reflect(b, 8) for b in range(256))
+
+def as_samples(samples):
+	''' a list of (bytes, checksum) from one (message, checksum) pair or many '''
+	if type(samples) == tuple and len(samples) == 2 and type(samples[1]) == int:
+		samples = [samples]
+	return [(bytes(data), checksum) for (data, checksum) in samples]
+
+def screen(samples, width=None, workers=None, limit=None):
+	''' catalog entries matching every sample, stopping after limit matches
+		workers checks the entries across a process pool '''
+	samples = as_samples(samples)
+	entries = [e for e in crc_catalog.database if not width or e['width'] == width]
+	if workers:
+		return parallel.screen(samples, entries, workers, limit)
+
+	result = []
+	for entry in entries:
+		crc = engine.lookup(entry)
+		if all(crc.compute(data) == checksum for (data, checksum) in samples):
+			result.append(entry)
+			if limit and len(result) >= limit:
+				break
+	return result
+
+def message_poly(data, refin):
+	''' the message as a polynomial, first bit of the stream highest '''
+	if refin:
+		data = data.translate(reflected_bytes)
+	return int.from_bytes(data, 'big')
+
+def candidate_polys(samples, width, refin, refout):
+	''' full polynomials (x^width term included) of degree width that divide
+		the D of every same length pair '''
+	firsts = {}
+	g = 0
+	for (data, checksum) in samples:
+		if not len(data) in firsts:
+			firsts[len(data)] = (message_poly(data, refin), checksum)
+			continue
+		(m0, c0) = firsts[len(data)]
+		c = checksum ^ c0
+		if refout:
+			c = reflect(c, width)
+		g = polynomial.gcd(g, ((message_poly(data, refin) ^ m0) << width) ^ c)
+
+	# no pairs, or nothing but duplicates
+	if g.bit_length() <= width:
+		return []
+
+	cofactor = g.bit_length() - 1 - width
+	if cofactor > MAX_COFACTOR:
+		return []
+
+	# crc polynomials have a constant term, without one the low bits of the
+	# register are just the message shifted
+	result = []
+	for q in range(1<<cofactor, 2<<cofactor):
+		(p, remainder) = polynomial.divide(g, q)
+		if not remainder and p & 1:
+			result.append(p)
+	return result
+
+def solve_init_xorout(samples, width, poly, refin, refout):
+	''' (init, xorout) making every sample's checksum, or None '''
+	base = engine.lookup({'width':width, 'poly':poly, 'init':0, 'refin':refin, 'refout':False, 'xorout':0})
+
+	# inputs are the xorout bits then the init bits, each the concatenation of
+	# its influence on one sample of every distinct length
+	lengths = {}
+	for (data, checksum) in samples:
+		lengths.setdefault(len(data), (data, checksum))
+
+	inputs = [0] * (2*width)
+	target = 0
+	for (length, (data, checksum)) in lengths.items():
+		if refout:
+			checksum = reflect(checksum, width)
+		target = (target << width) | (checksum ^ base.compute(data))
+
+		shifted = polynomial.xpowmod(8*length, poly, width)
+		for j in range(width):
+			inputs[j] = (inputs[j] << width) | (1<<j)
+			inputs[width+j] = (inputs[width+j] << width) | shifted
+			shifted = polynomial.mulx(shifted, poly, width)
+
+	combo = subsetxor.System(inputs).combination(target)
+	if combo is None:
+		return None
+	return (combo >> width, combo & ((1<<width) - 1))
+
+def search(samples, width, skip=()):
+	''' parameter dicts of the given width matching every sample, skip holds
+		(width, poly, refin, refout) already accounted for '''
+	result = []
+	if any(checksum.bit_length() > width for (data, checksum) in samples):
+		return result
+
+	for refin in [False, True]:
+		for refout in [False, True]:
+			for full in candidate_polys(samples, width, refin, refout):
+				poly = full ^ (1<<width)
+				if (width, poly, refin, refout) in skip:
+					continue
+				solved = solve_init_xorout(samples, width, poly, refin, refout)
+				if not solved:
+					continue
+				(init, xorout) = solved
+				params = {'width':width, 'poly':poly, 'init':init, 'refin':refin, 'refout':refout, 'xorout':xorout}
+				crc = engine.lookup(params)
+				if all(crc.compute(data) == checksum for (data, checksum) in samples):
+					result.append(params)
+	return result
+
+def identify(samples, width=None, catalog=True, workers=None):
+	''' crc parameters producing every (message, checksum) sample, catalog
+		entries first then any others found by searching, those carry a check
+		value and name None
+		without a width every width up to MAX_WIDTH is searched '''
+	samples = as_samples(samples)
+
+	result = []
+	if catalog:
+		result = screen(samples, width, workers)
+
+	# catalog matches take precedence over other init/xorout for their poly,
+	# which can match too when the sample lengths do not pin them down
+	known = {engine.params_key(e): e for e in crc_catalog.database}
+	skip = {tuple(e[k] for k in ['width', 'poly', 'refin', 'refout']) for e in result}
+
+	if width:
+		widths = [width]
+	else:
+		widths = range(max(1, max(checksum.bit_length() for (data, checksum) in samples)), MAX_WIDTH+1)
+
+	for w in widths:
+		for params in search(samples, w, skip):
+			key = engine.params_key(params)
+			if key in known:
+				result.append(known[key])
+			else:
+				params['name'] = None
+				params['check'] = engine.compute(b'123456789', params)
+				result.append(params)
+
+	return result
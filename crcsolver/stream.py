@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+
+# hashlib style incremental checksums
+#
+# only the register is carried between update() calls, xorout and refout are
+# applied when the checksum is read, so data can be fed in any size chunks
+
+from . import engine
+
+class Crc():
+	def __init__(self, crc_name, data=b''):
+		self.engine = engine.lookup(crc_name)
+		self.register = self.engine.initial()
+		self.update(data)
+
+	@property
+	def name(self):
+		return self.engine.name
+
+	@property
+	def digest_size(self):
+		return (self.engine.width + 7) // 8
+
+	def update(self, data):
+		self.register = self.engine.process(self.register, data)
+
+	def checksum(self):
+		''' the crc of everything fed so far, as an integer '''
+		return self.engine.finalize(self.register)
+
+	def digest(self):
+		''' the checksum as big endian bytes '''
+		return self.checksum().to_bytes(self.digest_size, 'big')
+
+	def hexdigest(self):
+		return self.digest().hex()
+
+	def copy(self):
+		''' an independent Crc with the same state, eg: to branch from a common prefix '''
+		tmp = Crc.__new__(Crc)
+		tmp.engine = self.engine
+		tmp.register = self.register
+		return tmp
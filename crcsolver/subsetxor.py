@@ -5,79 +5,143 @@ import random
 from itertools import compress
 from functools import reduce
 
-from .bitmatrix import BitMatrix
+from .engine import native
 
 def bitstr(val, width):
 	return bin(val)[2:].rjust(width, '0')
 
+class XorBasis():
+	''' incremental basis of GF(2) vectors (integers), each stored under the
+		position of its leading bit so a new vector reduces in O(width) xors
+
+		each vector carries a combo, the bitfield of inserted vectors it was
+		built from '''
+	def __init__(self):
+		self.pivots = {}
+
+	def __len__(self):
+		return len(self.pivots)
+
+	def copy(self):
+		result = XorBasis()
+		result.pivots = dict(self.pivots)
+		return result
+
+	def reduce(self, vec, combo=0):
+		''' clear every pivot bit of vec, returns (remainder, combo) '''
+		if native and vec.bit_length() <= 64:
+			return native.xor_reduce(self.pivots, vec, combo)
+		rest = vec
+		while rest:
+			top = rest.bit_length() - 1
+			pivot = self.pivots.get(top)
+			if pivot:
+				vec ^= pivot[0]
+				combo ^= pivot[1]
+			rest = vec & ((1<<top) - 1)
+		return (vec, combo)
+
+	def insert(self, vec, combo=0):
+		''' add vec to the basis, returns False if it was dependent '''
+		(vec, combo) = self.reduce(vec, combo)
+		if not vec:
+			return False
+		self.pivots[vec.bit_length()-1] = (vec, combo)
+		return True
+
+	def reduced(self):
+		''' [(mask, vector, combo), ...] by descending pivot, with each pivot bit
+			cleared from every other vector (reduced row echelon form) '''
+		order = sorted(self.pivots)
+		rows = dict(self.pivots)
+		for (i, low) in enumerate(order):
+			(lvec, lcombo) = rows[low]
+			for high in order[i+1:]:
+				(hvec, hcombo) = rows[high]
+				if hvec & (1<<low):
+					rows[high] = (hvec ^ lvec, hcombo ^ lcombo)
+		return [(1<<p, rows[p][0], rows[p][1]) for p in reversed(order)]
+
 def independent_subset(inputs):
 	''' given a list of integers, return a list of those that are linearly independent '''
 
 	width = max(x.bit_length() for x in inputs)
-	basis = BitMatrix(0, width)
+	basis = XorBasis()
 
 	result = []
 	for inp in inputs:
-		ranka = basis.rank()
-		basis.row_append(inp)
-		basis = basis.row_echelon()
-		rankb = basis.rank()
-
-		if rankb > ranka:
+		if basis.insert(inp):
 			result.append(1)
 		else:
 			result.append(0)
-			basis.row_pop()
 
 		# at most n independent vectors of width n
-		if basis.nrows >= width:
+		if len(basis) >= width:
 			result = result + [0]*(len(inputs)-len(result))
 			break
 
 	return result
 
+class System():
+	''' the elimination behind solve(), done once for a list of inputs so that
+		any number of targets can be solved against it '''
+	def __init__(self, inputs):
+		self.ninputs = len(inputs)
+		self.width = max([x.bit_length() for x in inputs])
+
+		# combo has bit i set if inputs[i] is among those xor'd to produce a row
+		# each dependent input reduces to zero, and its combo is then a
+		# nonzero selector that xors to zero, together they span the nullspace
+		basis = XorBasis()
+		self.nullspace = []
+		for (i, inp) in enumerate(inputs):
+			if not basis.insert(inp, 1<<i):
+				self.nullspace.append(basis.reduce(inp, 1<<i)[1])
+
+		# pivots, eg:
+		# [0]: (0x8000, row, combo) "use row 0 to toggle bit 15"
+		# [1]: (0x4000, row, combo) "use row 1 to toggle bit 14"
+		# [2]: (0x0010, row, combo) "use row 2 to toggle bit 4"
+		self.pivots = basis.reduced()
+
+	def combination(self, target):
+		''' bitfield over inputs that xor to target, or None
+			the echelon is reduced, so target is in the span exactly when the
+			rows picked out by its pivot bits xor back to it '''
+		(check, combo) = (0, 0)
+		for (mask, row, c) in self.pivots:
+			if target & mask:
+				check ^= row
+				combo ^= c
+		if check != target:
+			return None
+		return combo
+
+	def solve(self, target):
+		''' selector over inputs, or [] if target is not reachable '''
+		combo = self.combination(target)
+		if combo is None:
+			return []
+		return [(combo >> i) & 1 for i in range(self.ninputs)]
+
+def solution_space(inputs, target):
+	''' every selector solving the system, as (particular, nullspace basis)
+		any particular ^ (xor of a subset of the nullspace) is also a solution
+		returns None if target is not reachable '''
+	system = System(inputs)
+	particular = system.solve(target)
+	if not particular:
+		return None
+	nullspace = [[(c >> i) & 1 for i in range(system.ninputs)] for c in system.nullspace]
+	return (particular, nullspace)
+
 def solve(inputs, target):
 	width = max([x.bit_length() for x in inputs])
 	if target.bit_length() > width:
 		return []
 
-	selector = independent_subset(inputs)
-	chosen = list(compress(inputs, selector))
-	chosen_idxs = [x for x in range(len(selector)) if selector[x]]
-
-	record = BitMatrix(len(chosen), len(chosen))
-	record.set_identity(relaxed=True)
-	echelon = BitMatrix(len(chosen), width, chosen).row_echelon(record)
-
-	# row2mask, eg:
-	# [0]: 0x8000 "use row 0 to toggle bit 15"
-	# [1]: 0x4000 "use row 1 to toggle bit 14"
-	# [2]: 0x0010 "use row 2 to toggle bit 4"
-	row2mask = [1<<(echelon.rows[x].bit_length()-1) for x in range(echelon.rank())]
-
-	rows_used_bitfield = 0
-	for (row, mask) in enumerate(row2mask):
-		if target & mask:
-			rows_used_bitfield ^= record.rows[row]
-
-	# selector, eg:
-	# [0,1,0,1]
-	#  | | | +- chosen[3] used
-	#  | | +--- chosen[2] NOT used
-	#  | +----- chosen[1] used
-	#  +------- chosen[0] NOT used
-	selector = [int(x) for x in bitstr(rows_used_bitfield, record.nrows)]
-	if target != reduce(lambda a,b:a^b, compress(chosen, selector), 0):
-		return []
-
-	# convert selector over chosen to selector over original inputs
-	tmp = [0]*len(inputs)
-	for (i, s) in enumerate(selector):
-		if not s: continue
-		tmp[chosen_idxs[i]] = 1
-	selector = tmp
-	assert target == reduce(lambda a,b:a^b, compress(inputs, selector), 0)
+	selector = System(inputs).solve(target)
+	assert not selector or target == reduce(lambda a,b:a^b, compress(inputs, selector), 0)
 
 	# done
 	return selector
-
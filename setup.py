@@ -15,6 +15,13 @@ setuptools.setup(
     long_description_content_type="text/markdown",
     url="https://github.com/lwerdna/crcsolver",
     packages=setuptools.find_packages(),
+    ext_modules=[
+        # optional, compiled kernels, skipped if there is no compiler
+        setuptools.Extension("crcsolver._native", ["crcsolver/_native.c"], optional=True),
+    ],
+    extras_require={
+        "numpy": ["numpy"], # optional, packed BitMatrix backend and compute_batch()
+    },
     classifiers=[
         "Programming Language :: Python :: 3",
         "License :: Public Domain",
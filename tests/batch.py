@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+
+# batch checksums agree with one at a time checksums
+
+import os
+import sys
+import subprocess
+
+from crcsolver import batch, compute, compute_batch
+from crcsolver.crc_catalog import database
+
+if __name__ == '__main__':
+	messages = [os.urandom(23) for i in range(100)]
+
+	for entry in database:
+		expected = [compute(m, entry) for m in messages]
+		assert [int(x) for x in compute_batch(messages, entry['name'])] == expected
+
+	numpy = batch.get_numpy()
+	if numpy:
+		array = numpy.frombuffer(b''.join(messages), dtype=numpy.uint8).reshape(100, 23)
+		for name in ['CRC-32/ISO-HDLC', 'CRC-64/XZ', 'CRC-12/UMTS', 'CRC-5/USB', 'CRC-82/DARC']:
+			expected = [compute(m, name) for m in messages]
+			assert [int(x) for x in compute_batch(array, name)] == expected
+			assert [int(x) for x in compute_batch(array[::3], name)] == expected[::3]
+
+		# strided arrays are checksummed too, copied
+		for name in ['CRC-32/ISO-HDLC', 'CRC-64/XZ', 'CRC-82/DARC']:
+			assert compute(array[:, ::2], name) == compute(array[:, ::2].tobytes(), name)
+			assert compute(array.T, name) == compute(array.T.tobytes(), name)
+
+		# empty messages, and no messages
+		assert list(compute_batch(numpy.zeros((4, 0), dtype=numpy.uint8), 'CRC-32')) == [0]*4
+		assert len(compute_batch([], 'CRC-32')) == 0
+
+		for bad in [[b'abc', b'abcd'], numpy.zeros((4, 4), dtype=numpy.uint16), numpy.zeros(4, dtype=numpy.uint8)]:
+			raised = False
+			try:
+				compute_batch(bad, 'CRC-32')
+			except Exception:
+				raised = True
+			assert raised
+
+	# without numpy each message goes through the table engine
+	saved = batch.get_numpy
+	batch.get_numpy = lambda: None
+	assert compute_batch(messages, 'CRC-32') == [compute(m, 'CRC-32') for m in messages]
+	batch.get_numpy = saved
+
+	# and importing crcsolver does not import numpy
+	assert not subprocess.run([sys.executable, '-c', 'import sys, crcsolver; sys.exit("numpy" in sys.modules)']).returncode
+
+	print('PASS')
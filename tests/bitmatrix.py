@@ -2,6 +2,7 @@
 
 import random
 
+from crcsolver import bitmatrix, packed
 from crcsolver.bitmatrix import BitMatrix, MatrixException
 
 if __name__ == '__main__':
@@ -45,6 +46,37 @@ if __name__ == '__main__':
 	except MatrixException:
 		pass
 
+	# test validation at construction and on single row mutation
+	for (nrows, ncols, rows) in [(3, 8, [1, 256]), (2, 8, [1, 2, 3])]:
+		try:
+			BitMatrix(nrows, ncols, rows)
+			print('FAIL')
+			assert False
+		except MatrixException:
+			pass
+	bm = BitMatrix(2, 8)
+	bm.set_row(1, 255)
+	assert bm.rows == [0, 255]
+	try:
+		bm.set_row(0, 256)
+		print('FAIL')
+		assert False
+	except MatrixException:
+		pass
+	assert not hasattr(bm, '__dict__')
+
+	# test debug mode, direct writes to rows are only caught there
+	bm.rows[0] = 256
+	bm.row_pop()
+	bitmatrix.DEBUG = True
+	try:
+		bm.row_pop()
+		print('FAIL')
+		assert False
+	except MatrixException:
+		pass
+	bitmatrix.DEBUG = False
+
 	# test row echelon
 	# 1011    1000
 	# 1100 -> 0100
@@ -73,6 +105,23 @@ if __name__ == '__main__':
 	assert echelon == BitMatrix(4,4, [9,2,0,0])
 	assert echelon.rank() == 2
 
+	# test in place elimination, pivots give the rank
+	bm = BitMatrix(4,4, [9,11,0,2])
+	record = BitMatrix(4,4)
+	record.set_identity()
+	assert bm.eliminate(record) == [0, 2]
+	assert bm == BitMatrix(4,4, [9,2,0,0])
+	assert record.rows == [8, 12, 2, 13]
+	bm = BitMatrix(3,4, [0xB, 0xC, 0x7])
+	assert bm.eliminate() == [0, 1]
+	assert bm.rows == [11, 7, 0]
+	try:
+		BitMatrix(3,4).eliminate(BitMatrix(2,2))
+		print('FAIL')
+		assert False
+	except MatrixException:
+		pass
+
 	# test TALL row echelon
 	# 1      1
 	# 0   -> 0
@@ -95,6 +144,63 @@ if __name__ == '__main__':
 		A.set_random_independent_rows()
 		assert A.inverse() * A == identity
 
+	# products against the definition, including non-square and vectors
+	for i in range(50):
+		(n, m, p) = (random.randint(1,20), random.randint(1,20), random.randint(1,20))
+		A = BitMatrix(n, m)
+		A.set_random()
+		B = BitMatrix(m, p)
+		B.set_random()
+		C = A * B
+		assert (C.nrows, C.ncols) == (n, p)
+		for y in range(n):
+			for x in range(p):
+				expected = sum((A.rows[y] >> (m-1-k)) & (B.rows[k] >> (p-1-x)) & 1 for k in range(m)) % 2
+				assert (C.rows[y] >> (p-1-x)) & 1 == expected
+
+		v = BitMatrix(m, 1)
+		v.set_random()
+		assert A.mul_vector(v.get_column(0)) == (A * v).get_column(0)
+	try:
+		BitMatrix(2, 3) * BitMatrix(2, 3)
+		print('FAIL')
+		assert False
+	except MatrixException:
+		pass
+
+	# packed (numpy, M4RI) backend agrees with the plain one, when available
+	if packed.get_numpy():
+		threshold = bitmatrix.PACKED_THRESHOLD
+		for i in range(50):
+			(nrows, ncols) = (random.randint(1,40), random.randint(1,150))
+			A = BitMatrix(nrows, ncols)
+			A.set_random()
+			A.rows[-1] = 0
+			A.rows[0] = A.rows[-1] ^ A.rows[nrows//2]
+			(ra, rb) = (BitMatrix(nrows, nrows), BitMatrix(nrows, nrows))
+			ra.set_identity()
+			rb.set_identity()
+			bitmatrix.PACKED_THRESHOLD = 0
+			a = A.row_echelon(ra)
+			bitmatrix.PACKED_THRESHOLD = 1<<64
+			b = A.row_echelon(rb)
+			assert a == b
+			assert ra * A == a
+		bitmatrix.PACKED_THRESHOLD = threshold
+
+		# large inverse, selected automatically
+		A = BitMatrix(600, 600)
+		A.set_random_independent_rows()
+		assert 600*600 >= bitmatrix.PACKED_THRESHOLD
+		assert packed.unpack(packed.pack(A.rows, 600), 600) == A.rows
+		inverse = A.inverse()
+		for i in random.sample(range(600), 20):
+			check = 0
+			for j in range(600):
+				if inverse.rows[i] & (1<<(599-j)):
+					check ^= A.rows[j]
+			assert check == 1<<(599-i)
+
 	# solve Ax = B by x = A^-1 * B
 #	for i in range(100):
 #		dims = random.randint(1,64)
@@ -0,0 +1,28 @@
+#!/usr/bin/env python3
+
+# crc_combine() and crc_shift() agree with computing over the concatenation
+
+import random
+
+from crcsolver import compute, crc_combine, crc_shift
+from crcsolver.crc_catalog import database
+
+if __name__ == '__main__':
+	for entry in database:
+		name = entry['name']
+
+		assert crc_combine(compute(b'1234', name), compute(b'56789', name), 5, name) == entry['check']
+
+		for i in range(3):
+			a = bytes(random.getrandbits(8) for x in range(random.randint(0, 50)))
+			b = bytes(random.getrandbits(8) for x in range(random.randint(0, 300)))
+			assert crc_combine(compute(a, name), compute(b, name), len(b), name) == compute(a+b, name)
+
+			n = random.randint(0, 1000)
+			assert crc_shift(compute(a, name), n, name) == compute(a+bytes(n), name)
+
+	# parameter dicts
+	entry = {'width':32, 'poly':0x04c11db7, 'init':0, 'refin':False, 'refout':True, 'xorout':0x12345678}
+	assert crc_combine(compute(b'MON', entry), compute(b'KEY', entry), 3, entry) == compute(b'MONKEY', entry)
+
+	print('PASS')
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+
+# solving with per-byte constraints
+
+import random
+import string
+import binascii
+import itertools
+
+from crcsolver import solve, solutions, compute, constraints
+from crcsolver.constraints import pieces, allowed_values
+
+def members(base, directions):
+	result = [base]
+	for d in directions:
+		result += [m ^ d for m in result]
+	return result
+
+if __name__ == '__main__':
+	# pieces partition the allowed values, each piece entirely inside them
+	for allowed in [range(0x20, 0x7F), b'0123456789abcdef', lambda v: chr(v).isalnum(), [0x41], range(256)]:
+		values = allowed_values(allowed)
+		found = []
+		for (base, directions) in pieces(values):
+			found += members(base, directions)
+		assert sorted(found) == sorted(values)
+
+	# the printable range is mostly one piece
+	assert pieces(allowed_values(range(0x20, 0x7F)))[0] == (0x20, (1, 2, 4, 8, 16, 0x60))
+
+	# forced crc over printable identifiers
+	printable = string.ascii_letters + string.digits
+	result = solve(b'user_' + b'_'*12, range(40, 136), 0xdeadbeefcafebabe, 'CRC-64/XZ', allowed=printable)
+	assert result[:5] == b'user_'
+	assert all(chr(x) in printable for x in result[5:])
+	assert compute(result, 'CRC-64/XZ') == 0xdeadbeefcafebabe
+
+	# predicates, black boxes, and partially known bytes (top two bits known)
+	unknowns = [8*i + j for i in range(12) for j in range(2, 8)]
+	for x in itertools.islice(solutions(b'\x40'*12, unknowns, 0x12345678, binascii.crc32, allowed=lambda v: v != 0x7F), 50):
+		assert binascii.crc32(x) == 0x12345678
+		assert all(0x40 <= v < 0x7F for v in x)
+
+	# every solution is distinct, and the constrained ones are a subset of all
+	everything = set(solutions(b'ID:____', range(24, 56), 0x1234, 'CRC-16/XMODEM'))
+	upper = list(solutions(b'ID:____', range(24, 56), 0x1234, 'CRC-16/XMODEM', allowed=string.ascii_uppercase))
+	assert len(upper) == len(set(upper))
+	assert set(upper) == set(x for x in everything if x[3:].isupper() and x[3:].isalpha())
+
+	# per-byte constraints
+	result = solve(b'_'*7, range(56), 0xcbf43926, 'CRC-32', allowed={0:b'A', 1:b'B', 6:range(0x80)})
+	assert result[:2] == b'AB' and result[6] < 0x80 and compute(result, 'CRC-32') == 0xcbf43926
+
+	# unsolvable targets are pruned a byte at a time, trying every piece of
+	# 8 alphanumeric bytes, spanning every target, would not finish
+	for i in range(20):
+		result = solve(b'user_' + b'_'*8, range(40, 104), random.getrandbits(64), 'CRC-64/XZ', allowed=printable)
+		assert result is None or all(chr(x) in printable for x in result[5:])
+	assert solve(b'user_' + b'_'*10, range(40, 120), 0, 'CRC-64/XZ', allowed=b'') == None
+
+	# systems with little freedom beyond the crc give up rather than search for
+	# minutes, 16 hex digits leave 64 free bits against a 64 bit crc
+	limit = constraints.SEARCH_LIMIT
+	constraints.SEARCH_LIMIT = 2000
+	try:
+		solve(b'x'*16, range(128), 0xdcf4bb99f4bea973, 'CRC-64/XZ', allowed='0123456789abcdef')
+		raised = False
+	except Exception:
+		raised = True
+	assert raised
+	constraints.SEARCH_LIMIT = limit
+
+	# impossible constraints
+	assert solve(b'____', range(32), 0, 'CRC-32', allowed=b'') == None
+	assert solve(b'12345678_', range(64, 72), 0xcbf43926, 'CRC-32', allowed=b'8') == None
+	assert solve(b'12345678_', range(64, 72), 0xcbf43926, 'CRC-32', allowed=b'9') == b'123456789'
+
+	print('PASS')
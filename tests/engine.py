@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+
+# table driven engine agrees with the bitwise reference
+
+import random
+from array import array
+
+from crcsolver import engine, lookup, CrcEngine
+from crcsolver.main import compute_bitwise, affine_model
+from crcsolver.crc_catalog import database
+
+if __name__ == '__main__':
+	# a parameter dict looked up first still builds the named engine
+	crc32 = lookup({'width':32, 'poly':0x04c11db7, 'init':0xffffffff, 'refin':True, 'refout':True, 'xorout':0xffffffff})
+	assert crc32.name == 'CRC-32/ISO-HDLC'
+	assert repr(lookup('CRC-32')) == '<CrcEngine CRC-32/ISO-HDLC>'
+
+	for entry in database:
+		assert engine.compute(b'123456789', entry) == entry['check']
+		assert engine.compute(b'', entry) == compute_bitwise(b'', entry)
+
+		for i in range(20):
+			data = bytes(random.getrandbits(8) for x in range(random.randint(1, 40)))
+			assert engine.compute(data, entry) == compute_bitwise(data, entry)
+
+	# reflect() keeps only the low width bits
+	assert engine.reflect(0b1101, 3) == 0b101
+	assert engine.reflect(1, 64) == 1<<63
+	assert engine.reflect(0, 82) == 0
+
+	# tables are shared between algorithms with the same (width, poly, refin)
+	a = engine.get_table(32, 0x04c11db7, True)
+	b = engine.get_table(32, 0x04c11db7, True)
+	assert a is b
+	assert len(a) == 256
+
+	# generalized parameters, including odd widths in both orientations
+	for width in [1, 2, 3, 7, 9, 33, 65, 100]:
+		for i in range(10):
+			entry = {'width':width, 'poly':random.getrandbits(width)|1,
+				'init':random.getrandbits(width), 'xorout':random.getrandbits(width),
+				'refin':random.choice([True,False]), 'refout':random.choice([True,False])}
+			data = bytes(random.getrandbits(8) for x in range(random.randint(0, 20)))
+			assert engine.compute(data, entry) == compute_bitwise(data, entry)
+
+	# engines are cached, names are case insensitive and aliases resolve
+	assert lookup('CRC-32/ISO-HDLC') is crc32
+	assert isinstance(crc32, CrcEngine)
+	assert lookup('crc-32/iso-hdlc') is crc32
+	assert lookup('CRC-32') is crc32
+	assert lookup('pkzip') is crc32
+	assert lookup(crc32) is crc32
+	assert lookup({'width':32, 'poly':0x04c11db7, 'init':0xffffffff, 'refin':True, 'refout':True, 'xorout':0xffffffff}) is crc32
+	try:
+		lookup('CRC-33/NONEXISTENT')
+		raised = False
+	except Exception:
+		raised = True
+	assert raised
+
+	# update() continues a finished checksum, for every algorithm
+	for entry in database:
+		eng = lookup(entry['name'])
+		assert eng.update(eng.compute(b'1234'), b'56789') == entry['check']
+		assert eng.unfinalize(eng.finalize(eng.initial())) == eng.initial()
+
+	# any buffer protocol object, viewed as bytes without copying
+	data = bytes(random.getrandbits(8) for x in range(64))
+	expected = crc32.compute(data)
+	words = array('I')
+	words.frombytes(data)
+	for obj in [bytearray(data), memoryview(data), words, memoryview(data).cast('B', (8, 8)), memoryview(words)]:
+		assert crc32.compute(obj) == expected
+	assert crc32.compute(list(data)) == expected
+
+	# strided buffers are copied, for native kernels and table loops alike
+	for name in ['CRC-32/ISO-HDLC', 'CRC-32C', 'CRC-82/DARC']:
+		eng = lookup(name)
+		assert eng.compute(memoryview(data)[::2]) == eng.compute(data[::2])
+		assert eng.compute(memoryview(words)[::3]) == eng.compute(words[::3].tobytes())
+
+	# analytic influence vectors agree with measuring them
+	for entry in database:
+		eng = lookup(entry['name'])
+		length = random.randint(1, 40)
+		unknowns = [random.randint(0, 8*length-1) for i in range(16)]
+		assert eng.influence(length, unknowns) == affine_model(eng.compute, length).influence(unknowns)
+
+	# kernels are picked once per engine, native ones agree with the table loops
+	assert lookup('CRC-32/ISO-HDLC').kernel and lookup('CRC-32/JAMCRC').kernel
+	assert lookup('CRC-16/XMODEM').kernel and lookup('CRC-16/GENIBUS').kernel
+	assert not lookup('CRC-82/DARC').kernel
+	assert bool(lookup('CRC-32C').kernel) == bool(engine.native)
+	for entry in database:
+		eng = lookup(entry['name'])
+		if not eng.kernel:
+			continue
+		for i in range(20):
+			data = bytes(random.getrandbits(8) for x in range(random.randint(0, 100)))
+			reg = random.getrandbits(eng.width)
+			expected = engine.update(eng.table, reg, data, eng.width, eng.refin)
+			assert eng.kernel(reg, data) == expected
+			assert eng.process(reg, memoryview(data)) == expected
+
+	# the extension's slicing loop, for every lane count
+	if engine.native:
+		for entry in database:
+			(width, poly, refin) = (entry['width'], entry['poly'], entry['refin'])
+			rwidth = engine.register_width(width, refin)
+			if rwidth > 64:
+				continue
+			for n in [1, 2, 3, 8, 16]:
+				tables = array('Q', engine.native.make_tables(width, poly, refin, n))
+				assert list(tables[:256]) == engine.get_table(width, poly, refin)
+				data = bytes(random.getrandbits(8) for x in range(random.randint(0, 70)))
+				reg = random.getrandbits(rwidth)
+				expected = engine.update(engine.get_table(width, poly, refin), reg, data, width, refin)
+				assert engine.native.update(tables, reg, data, rwidth, refin) == expected
+
+	# engines solve too
+	assert crc32.solve(b'MONK__', range(32,48), 0x401a68b6) == b'MONKEY'
+
+	print('PASS')
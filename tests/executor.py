@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+
+# black box probes evaluated through executors and coroutines
+
+import time
+import asyncio
+import binascii
+import dataclasses
+import threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+from crcsolver import solve, solve_async, solutions, solve_many
+
+def crc64(data):
+	''' module level, so a process pool can pickle it '''
+	crc = 0
+	for b in data:
+		crc = crc ^ b
+		for k in range(8):
+			if crc & 1:
+				crc = (crc >> 1) ^ 0xC96C5795D7870F42
+			else:
+				crc = (crc >> 1)
+	return crc
+
+if __name__ == '__main__':
+	# a slow callback, probes overlap when run on a thread pool
+	active = [0, 0]
+	lock = threading.Lock()
+	def slow_crc32(data):
+		with lock:
+			active[0] += 1
+			active[1] = max(active)
+		time.sleep(0.01)
+		with lock:
+			active[0] -= 1
+		return binascii.crc32(data)
+
+	with ThreadPoolExecutor(max_workers=8) as pool:
+		assert solve(b'MONK__', range(32,48), 0x401a68b6, slow_crc32, executor=pool) == b'MONKEY'
+		assert active[1] > 1
+		found = list(solutions(b'M_NKEY', range(8,16), 0x401a68b6, slow_crc32, executor=pool))
+		assert found == [b'MONKEY']
+		assert solve_many([b'MONK__', b'HONK__'], range(32,48), [0x401a68b6, 0x10d7f905], slow_crc32, executor=pool) == [b'MONKEY', b'HONKEY']
+
+	# a process pool, with a picklable callback
+	with ProcessPoolExecutor(max_workers=4) as pool:
+		data = bytes(range(64))
+		desired = 0x6963636972706163
+		result = solve(data, range(8*20, 8*28), desired, crc64, executor=pool)
+		assert crc64(result) == desired and result[:20] == data[:20] and result[28:] == data[28:]
+
+	# coroutine callbacks, probes are awaited together
+	waiting = [0, 0]
+	async def remote_crc32(data):
+		waiting[0] += 1
+		waiting[1] = max(waiting)
+		await asyncio.sleep(0.01)
+		waiting[0] -= 1
+		return binascii.crc32(data)
+
+	assert asyncio.run(solve_async(b'__NKEY', range(16), 0x401a68b6, remote_crc32)) == b'MONKEY'
+	assert waiting[1] > 16
+	@dataclasses.dataclass
+	class RemoteChecksum:
+		value: int = 0
+		async def __call__(self, data):
+			return binascii.crc32(data, self.value)
+	assert asyncio.run(solve_async(b'__NKEY', range(16), 0x401a68b6, RemoteChecksum())) == b'MONKEY'
+	# more layouts in flight than the caches hold, each plan is built on the
+	# model its own probes were awaited into
+	async def many():
+		return await asyncio.gather(*[solve_async(b'MONK' + b'_'*n, range(32,64), 0x401a68b6, remote_crc32) for n in range(4, 80)])
+	results = asyncio.run(many())
+	assert all(binascii.crc32(r) == 0x401a68b6 and r[:4] == b'MONK' for r in results)
+
+	# coroutine functions are refused by the synchronous path
+	raised = False
+	try:
+		solve(b'MONK__', range(32,48), 0x401a68b6, remote_crc32)
+	except Exception:
+		raised = True
+	assert raised
+
+	result = asyncio.run(solve_async(b'____EY', range(32), 0x1234, remote_crc32))
+	assert binascii.crc32(result) == 0x1234 and result[4:] == b'EY'
+
+	print('PASS')
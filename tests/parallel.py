@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+
+# chunk-and-combine checksums agree with serial ones
+
+import os
+import tempfile
+import concurrent.futures
+
+from crcsolver import compute, compute_file, parallel
+
+if __name__ == '__main__':
+	# chunking covers the input exactly
+	for length in [0, 1, 100, 1<<16, (1<<20)+3]:
+		for nchunks in [1, 2, 7, 32]:
+			bounds = parallel.chunk_bounds(length, nchunks)
+			assert bounds[0][0] == 0 and bounds[-1][1] == length
+			assert all(a[1] == b[0] for (a, b) in zip(bounds, bounds[1:]))
+			assert len(bounds) <= nchunks
+
+	data = os.urandom(5*parallel.MIN_CHUNK + 123)
+
+	with tempfile.NamedTemporaryFile(delete=False) as fp:
+		fp.write(data)
+		path = fp.name
+
+	try:
+		for name in ['CRC-32/ISO-HDLC', 'CRC-64/XZ', 'CRC-16/XMODEM', 'CRC-12/UMTS', 'CRC-5/USB', 'CRC-82/DARC']:
+			expected = compute(data, name)
+			assert compute(data, name, workers=4) == expected
+			assert compute_file(path, name) == expected
+			assert compute_file(path, name, workers=3) == expected
+
+		# zero copy inputs
+		assert compute(memoryview(data), 'CRC-32/ISO-HDLC', workers=4) == compute(data, 'CRC-32/ISO-HDLC')
+		assert compute(bytearray(data), 'CRC-32/ISO-HDLC', workers=4) == compute(data, 'CRC-32/ISO-HDLC')
+
+		# small inputs stay serial, and so do buffers a native kernel checksums
+		assert compute(b'123456789', 'CRC-32/ISO-HDLC', workers=8) == 0xcbf43926
+		saved = concurrent.futures.ProcessPoolExecutor
+		concurrent.futures.ProcessPoolExecutor = None
+		for name in ['CRC-32/ISO-HDLC', 'CRC-16/XMODEM']:
+			assert compute(data, name, workers=4) == compute(data, name)
+		concurrent.futures.ProcessPoolExecutor = saved
+	finally:
+		os.unlink(path)
+
+	# empty files cannot be mapped
+	with tempfile.NamedTemporaryFile(delete=False) as fp:
+		path = fp.name
+	try:
+		assert compute_file(path, 'CRC-32/ISO-HDLC') == 0
+		assert compute_file(path, 'CRC-3/GSM', workers=2) == compute(b'', 'CRC-3/GSM')
+	finally:
+		os.unlink(path)
+
+	print('PASS')
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+
+# solve plans are reusable across data and targets sharing a layout
+
+import random
+import binascii
+import dataclasses
+
+from crcsolver import main, batch, prepare, solve, solve_many, solutions, compute
+
+if __name__ == '__main__':
+	# plans are cached on the layout
+	plan = prepare(6, range(32,48), 'CRC-32/ISO-HDLC')
+	assert prepare(6, list(range(32,48)), 'CRC-32/ISO-HDLC') is plan
+	assert prepare(6, range(32,48), 'crc-32') is plan
+	assert prepare(7, range(32,48), 'CRC-32/ISO-HDLC') is not plan
+
+	assert plan.apply(b'MONK__', 0x401a68b6) == b'MONKEY'
+	assert plan.apply(b'MONKEY', 0x401a68b6) == b'MONKEY'
+	assert plan.apply(b'HONK__', compute(b'HONKEY', 'CRC-32')) == b'HONKEY'
+
+	# same answers as solve, for names and black boxes alike
+	for crc_func in ['CRC-16/XMODEM', 'CRC-32/ISO-HDLC', 'CRC-64/XZ', binascii.crc32]:
+		length = 32
+		unknowns = random.sample(range(8*length), 80)
+		plan = prepare(length, unknowns, crc_func)
+		for i in range(50):
+			data = bytes(random.getrandbits(8) for x in range(length))
+			desired = random.getrandbits(16)
+			result = plan.apply(data, desired)
+			assert result == solve(data, unknowns, desired, crc_func)
+			if crc_func == binascii.crc32:
+				assert binascii.crc32(result) == desired
+			else:
+				assert compute(result, crc_func) == desired
+
+	# unknowns scattered over a large message, plans hold combos over the
+	# unknowns, not integers spanning the bytes between them
+	data = bytes(1<<20)
+	unknowns = sorted(random.sample(range(8*len(data)), 300))
+	plan = prepare(len(data), unknowns, 'CRC-64/XZ')
+	assert all(combo.bit_length() <= len(unknowns) for lane in plan.lanes for (check, combo) in lane)
+	result = plan.apply(data, 0x0123456789abcdef)
+	assert compute(result, 'CRC-64/XZ') == 0x0123456789abcdef
+	assert all(result[i] == 0 for i in range(len(data)) if not i in plan.keep)
+
+	# batches, from sequences or iterators, with one or many targets
+	records = [bytes(random.getrandbits(8) for x in range(64)) for i in range(200)]
+	unknowns = list(range(8*10, 8*18))
+	targets = [random.getrandbits(64) for r in records]
+	results = solve_many(iter(records), unknowns, iter(targets), 'CRC-64/XZ')
+	assert len(results) == len(records)
+	for (solution, record, target) in zip(results, records, targets):
+		assert solution == solve(record, unknowns, target, 'CRC-64/XZ')
+		assert solution[:10] == record[:10] and solution[18:] == record[18:]
+		assert compute(solution, 'CRC-64/XZ') == target
+
+	results = solve_many(records, unknowns, 0x1234, binascii.crc32)
+	assert all(binascii.crc32(x) == 0x1234 for x in results)
+
+	assert solve_many([], unknowns, 0, 'CRC-32') == []
+
+	# one target per record, no more and no fewer
+	for wrong in [targets[:-1], targets + [0], iter(targets[:-1]), []]:
+		try:
+			solve_many(records, unknowns, wrong, 'CRC-64/XZ')
+			raised = False
+		except Exception:
+			raised = True
+		assert raised
+
+	# batches agree with applying the plan to each record, including
+	# unsolvable ones, for arrays of records and numpy targets
+	for crc_func in ['CRC-5/USB', 'CRC-16/ARC', 'CRC-82/DARC', binascii.crc32]:
+		for unknowns in [random.sample(range(8*40), 70), random.sample(range(8*40), 10)]:
+			records = [bytes(random.getrandbits(8) for x in range(40)) for i in range(50)]
+			targets = [random.getrandbits(16) for r in records]
+			plan = prepare(40, unknowns, crc_func)
+			expected = [plan.apply(r, t) for (r, t) in zip(records, targets)]
+			assert solve_many(records, unknowns, targets, crc_func) == expected
+			numpy = batch.get_numpy()
+			if numpy:
+				array = numpy.frombuffer(b''.join(records), dtype=numpy.uint8).reshape(50, 40)
+				assert solve_many(array, unknowns, numpy.array(targets, dtype=numpy.uint32), crc_func) == expected
+				assert solve_many(array, unknowns, numpy.uint16(5), crc_func) == [plan.apply(r, 5) for r in records]
+
+	# black boxes are measured once per length, later layouts reuse the model
+	calls = []
+	def counted(data):
+		calls.append(data)
+		return binascii.crc32(data)
+	assert solve(b'MONK__', range(32,48), 0x401a68b6, counted) == b'MONKEY'
+	first = len(calls)
+	assert first == 1 + 16 + main.SPOT_CHECKS + 1
+	assert solve(b'MO__EY', range(16,32), 0x401a68b6, counted) == b'MONKEY'
+	assert len(calls) == first + 16 + main.SPOT_CHECKS + 1
+	assert solve(b'MO____', range(16,48), 0x401a68b6, counted) == b'MONKEY'
+	assert len(calls) == first + 16 + main.SPOT_CHECKS + 2
+	model = main.affine_model(counted, 6)
+	assert sorted(model.influences) == list(range(16,48))
+	assert model.predict(bytes(2) + b'NKEY') == binascii.crc32(bytes(2) + b'NKEY')
+
+	# and must be affine
+	raised = False
+	try:
+		solve(bytes(8), range(64), 0, lambda data: binascii.crc32(data) & sum(data))
+	except Exception:
+		raised = True
+	assert raised
+	assert solve_many([b'albatross']*3, range(8), 3854672161, binascii.crc32) == [None]*3
+
+	# unhashable black boxes are not cached, but still solve
+	@dataclasses.dataclass
+	class Checksum:
+		value: int = 0
+		def __call__(self, data):
+			return binascii.crc32(data, self.value)
+	crc_func = Checksum()
+	assert solve(b'MONK__', range(32,48), 0x401a68b6, crc_func) == b'MONKEY'
+	assert solve_many([b'MONK__', b'HONK__'], range(32,48), [0x401a68b6, 0x10d7f905], crc_func) == [b'MONKEY', b'HONKEY']
+	assert list(solutions(b'M_NKEY', range(8,16), 0x401a68b6, crc_func)) == [b'MONKEY']
+
+	# every solution, distinct, the first being solve()'s
+	def crc_hqx(x):
+		return binascii.crc_hqx(x, 0)
+	for crc_func in ['CRC-16/ARC', crc_hqx]:
+		data = b'\x00'*8
+		unknowns = list(range(0, 20)) + [5, 5]
+		found = list(solutions(data, unknowns, 0xBEEF, crc_func))
+		assert found[0] == solve(data, list(range(0, 20)), 0xBEEF, crc_func)
+		assert len(found) == 16 and len(set(found)) == 16
+		for x in found:
+			assert (compute(x, crc_func) if type(crc_func) == str else crc_func(x)) == 0xBEEF
+	assert list(solutions(b'albatross', range(8), 3854672161, binascii.crc32)) == []
+
+	# unsolvable targets
+	plan = prepare(9, range(8), binascii.crc32)
+	assert plan.apply(b'albatross', 3854672161) == None
+
+	# layout mismatches
+	for (length, unknowns) in [(4, [32]), (4, [-1])]:
+		try:
+			prepare(length, unknowns, 'CRC-32')
+			raised = False
+		except Exception:
+			raised = True
+		assert raised
+	try:
+		prepare(4, [0], 'CRC-32').apply(b'12345', 0)
+		raised = False
+	except Exception:
+		raised = True
+	assert raised
+
+	print('PASS')
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+
+# identify crc parameters from (message, checksum) samples
+
+import random
+
+from crcsolver import compute, identify, screen
+from crcsolver.crc_catalog import database
+
+def make_samples(params, lengths):
+	result = []
+	for length in lengths:
+		data = bytes(random.getrandbits(8) for i in range(length))
+		result.append((data, compute(data, params)))
+	return result
+
+if __name__ == '__main__':
+	# catalog entries are found by screening, and come first
+	for entry in random.sample(database, 20):
+		samples = make_samples(entry, [9, 9, 9, 9, 13])
+		found = identify(samples, width=entry['width'])
+		assert found[0] is entry
+		assert all(compute(data, params) == checksum for params in found for (data, checksum) in samples)
+
+	assert identify([(b'MONKEY', 0x401a68b6), (b'123456789', 0xcbf43926)])[0]['name'] == 'CRC-32/ISO-HDLC'
+
+	# anything else is found by searching, poly from the gcd of same length
+	# pairs, init and xorout by linear algebra
+	msgs = [b'MONKEY', b'HONKEY', b'DONKEY', b'BANANAS', b'JUNGLE']
+	params = {'width':16, 'poly':0x2f15, 'init':0x1d0f, 'refin':True, 'refout':False, 'xorout':0x0}
+	found = identify([(m, compute(m, params)) for m in msgs], width=16)
+	assert len(found) == 1
+	assert found[0]['name'] == None and found[0]['check'] == compute(b'123456789', params)
+	assert {k: found[0][k] for k in params} == params
+
+	for testi in range(50):
+		width = random.choice([3, 5, 8, 12, 16, 24, 32, 40, 64])
+		params = {'width':width, 'poly':random.getrandbits(width)|1, 'init':random.getrandbits(width),
+			'refin':random.choice([False, True]), 'refout':random.choice([False, True]), 'xorout':random.getrandbits(width)}
+		samples = make_samples(params, [12, 12, 12, 12, 17, 23])
+		found = identify(samples, width=width, catalog=False)
+		# init/xorout may not be unique for these lengths, but the crc is
+		assert any((p['poly'], p['refin'], p['refout']) == (params['poly'], params['refin'], params['refout']) for p in found)
+		for p in found:
+			assert all(compute(data, p) == checksum for (data, checksum) in samples)
+
+	# screening across a process pool agrees with screening serially
+	samples = [(b'', 0), (b'\x00'*7, 0)]
+	everything = screen(samples)
+	assert len(everything) > 3
+	assert screen(samples, workers=4) == everything
+	assert screen(samples, width=8, workers=3) == screen(samples, width=8)
+	assert screen((b'123456789', 0xcbf43926), workers=2)[0]['name'] == 'CRC-32/ISO-HDLC'
+	assert identify([(b'MONKEY', 0x401a68b6)], workers=2)[0]['name'] == 'CRC-32/ISO-HDLC'
+
+	# stopping early after enough hits
+	assert screen(samples, limit=2) == everything[:2]
+	for limit in [1, 3]:
+		found = screen(samples, workers=4, limit=limit)
+		assert len(found) == limit and all(entry in everything for entry in found)
+
+	# catalog only, with too few samples to search
+	assert identify([(b'MONKEY', 0x401a68b6)], width=32)[0]['name'] == 'CRC-32/ISO-HDLC'
+
+	print('PASS')
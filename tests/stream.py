@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+
+# incremental checksums agree with one-shot compute
+
+import random
+
+from crcsolver import new, compute
+from crcsolver.crc_catalog import database
+
+if __name__ == '__main__':
+	for entry in database:
+		name = entry['name']
+
+		# fed a byte at a time
+		crc = new(name)
+		for b in b'123456789':
+			crc.update(bytes([b]))
+		assert crc.checksum() == entry['check']
+
+		# digest is big endian, sized to the width
+		assert crc.digest_size == (entry['width'] + 7) // 8
+		assert int.from_bytes(crc.digest(), 'big') == entry['check']
+		assert int(crc.hexdigest(), 16) == entry['check']
+
+		# random chunking
+		data = bytes(random.getrandbits(8) for x in range(random.randint(0, 300)))
+		crc = new(name)
+		i = 0
+		while i < len(data):
+			n = random.randint(0, 17)
+			crc.update(data[i:i+n])
+			i += n
+		assert crc.checksum() == compute(data, name)
+
+		# branching from a shared prefix
+		prefix = new(name, b'1234')
+		a = prefix.copy()
+		b = prefix.copy()
+		a.update(b'56789')
+		b.update(b'5678')
+		assert a.checksum() == entry['check']
+		assert b.checksum() == compute(b'12345678', name)
+		assert prefix.checksum() == compute(b'1234', name)
+
+	assert new('CRC-32').name == 'CRC-32/ISO-HDLC'
+
+	print('PASS')
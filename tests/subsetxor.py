@@ -5,7 +5,7 @@ from itertools import compress
 from functools import reduce
 
 from crcsolver.bitmatrix import BitMatrix
-from crcsolver.subsetxor import solve, independent_subset
+from crcsolver.subsetxor import solve, solution_space, independent_subset, XorBasis
 
 if __name__ == '__main__':
 	# independent subset, they're all independent
@@ -49,6 +49,27 @@ if __name__ == '__main__':
 
 		assert a == b
 
+	# basis, vectors are stored under their leading bit
+	basis = XorBasis()
+	assert basis.insert(0xB, 1)
+	assert basis.insert(0xC, 2)
+	assert not basis.insert(0x7, 4)
+	assert not basis.insert(0, 8)
+	assert len(basis) == 2
+	assert basis.reduce(0x7) == (0, 3)
+	assert basis.reduce(0x1, 0x10) == (0x1, 0x10)
+
+	# reduced basis has each pivot bit in exactly one row
+	for testi in range(100):
+		basis = XorBasis()
+		inputs = [random.getrandbits(24) for i in range(random.randint(1, 30))]
+		for (i, inp) in enumerate(inputs):
+			basis.insert(inp, 1<<i)
+		rows = basis.reduced()
+		for (mask, row, combo) in rows:
+			assert [r for (m, r, c) in rows if r & mask] == [row]
+			assert row == reduce(lambda a,b:a^b, [x for (i,x) in enumerate(inputs) if combo & (1<<i)], 0)
+
 	# solve a system
 	inputs = []
 	inputs.append(0b1010)
@@ -156,6 +177,27 @@ if __name__ == '__main__':
 		check = reduce(lambda a,b:a^b, compress(inputs, selector), 0)
 		assert target == check
 
+	# solution spaces, every combination of the nullspace is a solution
+	assert solution_space([0xA, 0x3, 0x9, 0xF], 0x9) == ([1,1,0,0], [[1,1,1,0]])
+	assert solution_space([0xA, 0xA, 0xA], 0x1) == None
+	for testi in range(100):
+		width = random.randint(1,12)
+		inputs = [random.getrandbits(width) for i in range(random.randint(1,16))]
+		target = reduce(lambda a,b:a^b, [x for x in inputs if random.getrandbits(1)], 0)
+		(particular, nullspace) = solution_space(inputs, target)
+		assert particular == solve(inputs, target)
+		rank = sum(independent_subset(inputs))
+		assert len(nullspace) == len(inputs) - rank
+		found = set()
+		for k in range(1<<len(nullspace)):
+			selector = list(particular)
+			for (j, null) in enumerate(nullspace):
+				if k & (1<<j):
+					selector = [a^b for (a,b) in zip(selector, null)]
+			assert target == reduce(lambda a,b:a^b, compress(inputs, selector), 0)
+			found.add(tuple(selector))
+		assert len(found) == 1<<len(nullspace)
+
 	# TODO: construct and test systems WITHOUT solutions
 
 	print('PASS')
@@ -3,8 +3,7 @@
 # solve the 64-bit CRC given here:
 # https://yurichev.com/news/20200416_CRC64/
 
-import random
-from crcsolver import solve
+from crcsolver import solutions
 
 def CRC64(data):
 	crc = 0xFFFFFFFFFFFFFFFF
@@ -22,23 +21,19 @@ assert CRC64(b'lorem ipsum ') == target_crc
 
 print(hex(CRC64(b'lorem ipsum ')))
 
-solutions = set()
-
-random.seed()
-
-while 1:
-	unknowns = set(range(8*12))
-	# msb of each byte is 0 (ascii)
-	unknowns = unknowns - set([x*8 for x in range(12)])
-	unknowns = unknowns - set([(x*8)+1 for x in range(12)])
-	unknowns = list(unknowns)
-	random.shuffle(unknowns)
-	solution = solve(b'\x40'*12, unknowns, target_crc, CRC64)
-
-	if solution in solutions:
-		continue
+unknowns = set(range(8*12))
+# msb of each byte is 0 (ascii)
+unknowns = unknowns - set([x*8 for x in range(12)])
+unknowns = unknowns - set([(x*8)+1 for x in range(12)])
+unknowns = sorted(unknowns)
 
+# 72 unknowns against 64 bits of crc, the solution space has at least 2^8 members
+found = set()
+for solution in solutions(b'\x40'*12, unknowns, target_crc, CRC64):
 	assert CRC64(solution) == target_crc
-	solutions.add(solution)
+	assert not solution in found
+	found.add(solution)
 	print(solution)
 
+assert len(found) >= 256 and len(found) & (len(found)-1) == 0
+print('PASS')